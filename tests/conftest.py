@@ -37,3 +37,16 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_cache():
+    """Кеш в памяти, как в manage.py test (core.runner)."""
+    from django.test.utils import override_settings
+    from core.runner import in_memory_caches
+
+    with override_settings(CACHES=in_memory_caches()):
+        yield
@@ -0,0 +1,463 @@
+import math
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+CREATE_TABLE = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' delta REAL NOT NULL DEFAULT 0'
+    ')'
+)
+
+# Django создаёт экземпляр бэкенда на каждый поток, поэтому L1 хранится
+# здесь: один словарь на LOCATION для всех потоков процесса
+_l1_stores = {}
+_l1_stores_lock = threading.Lock()
+
+# Ключей в одном IN (...): старые сборки SQLite разрешают 999 параметров
+MAX_VARIABLES = 500
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов на машине.
+
+    LOCATION — путь к файлу; строка вида ``file:...`` открывается как
+    URI, так что ``file:name?mode=memory&cache=shared`` даёт кеш в
+    памяти процесса (удобно для тестов).
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path,
+                timeout=30,
+                isolation_level=None,
+                uri=self._path.startswith('file:'),
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(CREATE_TABLE)
+            local.connection = connection
+            local.pid = os.getpid()
+            local.writes = 0
+        return local.connection
+
+    def _read(self, key):
+        """Строка ``(value, expires, delta)`` живого ключа или ``None``."""
+        row = self._connection().execute(
+            'SELECT value, expires, delta FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row
+
+    def _write(self, key, value, timeout, delta=0.0, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        connection = self._connection()
+        if only_new:
+            # add(): занять ключ, только если его нет или он протух
+            cursor = connection.execute(
+                'INSERT INTO cache (key, value, expires, delta) '
+                'VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, '
+                'expires = excluded.expires, delta = excluded.delta '
+                'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+                (key, value, expires, delta, time.time()),
+            )
+            written = cursor.rowcount > 0
+        else:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires, delta) '
+                'VALUES (?, ?, ?, ?)',
+                (key, value, expires, delta),
+            )
+            written = True
+        self._local.writes += 1
+        if self._local.writes % 100 == 0:
+            self._cull(connection)
+        return written
+
+    def _read_many(self, keys):
+        """Живые строки по списку ключей: ``{key: (value, expires, delta)}``.
+
+        Один SELECT на каждые MAX_VARIABLES ключей вместо запроса на ключ.
+        """
+        connection = self._connection()
+        now = time.time()
+        rows = {}
+        for start in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[start:start + MAX_VARIABLES]
+            placeholders = ', '.join('?' * len(chunk))
+            for key, *row in connection.execute(
+                'SELECT key, value, expires, delta FROM cache '
+                f'WHERE key IN ({placeholders})',
+                chunk,
+            ):
+                if row[1] is None or row[1] > now:
+                    rows[key] = tuple(row)
+        return rows
+
+    def _write_many(self, rows, timeout):
+        """Записывает строки ``(key, value, delta)`` одной транзакцией."""
+        if not rows:
+            return
+        expires = self.get_backend_timeout(timeout)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, delta) '
+                'VALUES (?, ?, ?, ?)',
+                [(key, value, expires, delta) for key, value, delta in rows],
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        before = self._local.writes
+        self._local.writes += len(rows)
+        if self._local.writes // 100 != before // 100:
+            self._cull(connection)
+
+    def _cull(self, connection):
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),),
+        )
+        count, = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def _delete(self, key):
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        )
+        return cursor.rowcount > 0
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _make_keys(self, keys, version):
+        """``{полный ключ: исходный}`` с проверкой каждого ключа."""
+        made = {}
+        for raw_key in keys:
+            key = self.make_key(raw_key, version=version)
+            self.validate_key(key)
+            made[key] = raw_key
+        return made
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._read(key)
+        metrics.record_cache(row is not None)
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._write(key, self._dumps(value), timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._write(key, self._dumps(value), timeout, only_new=True)
+
+    def get_many(self, keys, version=None):
+        made = self._make_keys(keys, version)
+        rows = self._read_many(list(made))
+        result = {}
+        for key, raw_key in made.items():
+            row = rows.get(key)
+            metrics.record_cache(row is not None)
+            if row is not None:
+                result[raw_key] = pickle.loads(row[0])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        made = self._make_keys(data, version)
+        self._write_many(
+            [(key, self._dumps(data[raw_key]), 0.0)
+             for key, raw_key in made.items()],
+            timeout,
+        )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._delete(key)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._read(key) is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._read(key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dumps(value), key),
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединения живут весь поток: переоткрывать файл на каждый
+        # запрос дороже, чем держать его открытым
+        pass
+
+
+class TieredCache(SQLiteCache):
+    """Двухуровневый кеш: LRU в памяти процесса (L1) перед SQLite (L2).
+
+    L1 держит не больше ``L1_MAX_ENTRIES`` значений не дольше
+    ``L1_TIMEOUT`` секунд; ключи с префиксами ``L1_BYPASS_PREFIXES``
+    всегда читаются из общего L2. Для ключей с префиксами
+    ``SINGLE_FLIGHT_PREFIXES`` (по умолчанию фрагменты ``{% cache %}``)
+    работает защита от лавины:
+
+    * промах получает только один процесс, занявший блокировку,
+      остальные до ``LOCK_WAIT`` секунд ждут его результата;
+    * значение «досрочно протухает» с вероятностью, растущей к концу
+      TTL пропорционально времени его пересчёта (XFetch), так что
+      горячий ключ пересчитывается заранее одним клиентом, а остальные
+      в это время получают прежнее значение.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        options = params.get('OPTIONS', {})
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._l1_bypass = tuple(options.get('L1_BYPASS_PREFIXES', ()))
+        self._single_flight = tuple(
+            options.get('SINGLE_FLIGHT_PREFIXES', ('template.cache.',))
+        )
+        self._lock_timeout = float(options.get('LOCK_TIMEOUT', 10))
+        self._lock_wait = float(options.get('LOCK_WAIT', 2))
+        self._beta = float(options.get('EARLY_EXPIRY_BETA', 1))
+        with _l1_stores_lock:
+            self._l1, self._l1_lock = _l1_stores.setdefault(
+                location, (OrderedDict(), threading.Lock())
+            )
+
+    def _l1_get(self, key):
+        with self._l1_lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return entry[0]
+
+    def _l1_set(self, raw_key, key, value, expires):
+        if self._l1_max_entries <= 0 or raw_key.startswith(self._l1_bypass):
+            return
+        l1_expires = time.time() + self._l1_timeout
+        if expires is not None:
+            l1_expires = min(l1_expires, expires)
+        with self._l1_lock:
+            self._l1[key] = (value, l1_expires)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, key):
+        with self._l1_lock:
+            self._l1.pop(key, None)
+
+    def _computing(self):
+        if not hasattr(self._local, 'computing'):
+            self._local.computing = {}
+        return self._local.computing
+
+    def _acquire(self, key):
+        """Занимает право пересчитать ключ; запоминает время начала."""
+        lock = self._write(
+            f'{key}:lock', b'', self._lock_timeout, only_new=True
+        )
+        if lock:
+            self._computing()[key] = time.monotonic()
+        return lock
+
+    def _release(self, key):
+        started = self._computing().pop(key, None)
+        if started is None:
+            return 0.0
+        self._delete(f'{key}:lock')
+        return time.monotonic() - started
+
+    def _wait(self, key):
+        deadline = time.monotonic() + self._lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.025)
+            row = self._read(key)
+            if row is not None:
+                return row
+        return None
+
+    def _expires_early(self, row):
+        _, expires, delta = row
+        if expires is None or not delta:
+            return False
+        gap = -delta * self._beta * math.log(1 - random.random())
+        return time.time() + gap >= expires
+
+    def get(self, key, default=None, version=None):
+        raw_key = key
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value = self._l1_get(key)
+        if value is not None:
+            metrics.record_cache(True)
+            return pickle.loads(value)
+        row = self._read(key)
+        protected = raw_key.startswith(self._single_flight)
+        if row is None:
+            if not protected or self._acquire(key):
+                metrics.record_cache(False)
+                return default
+            row = self._wait(key)
+            if row is None:
+                metrics.record_cache(False)
+                return default
+        elif protected and self._expires_early(row) and self._acquire(key):
+            metrics.record_cache(False)
+            return default
+        metrics.record_cache(True)
+        self._l1_set(raw_key, key, row[0], row[1])
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        raw_key = key
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value = self._dumps(value)
+        self._write(key, value, timeout, delta=self._release(key))
+        self._l1_set(
+            raw_key, key, value, self.get_backend_timeout(timeout)
+        )
+
+    def get_many(self, keys, version=None):
+        """Сначала L1, затем один запрос к L2 за всеми промахами.
+
+        Защиты от лавины здесь нет: ключи ``SINGLE_FLIGHT_PREFIXES``
+        читаются поштучно через ``get``.
+        """
+        made = self._make_keys(keys, version)
+        result = {}
+        misses = []
+        for key, raw_key in made.items():
+            value = self._l1_get(key)
+            if value is None:
+                misses.append(key)
+            else:
+                metrics.record_cache(True)
+                result[raw_key] = pickle.loads(value)
+        rows = self._read_many(misses) if misses else {}
+        for key in misses:
+            row = rows.get(key)
+            metrics.record_cache(row is not None)
+            if row is not None:
+                raw_key = made[key]
+                self._l1_set(raw_key, key, row[0], row[1])
+                result[raw_key] = pickle.loads(row[0])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        made = self._make_keys(data, version)
+        rows = [
+            (key, self._dumps(data[raw_key]), self._release(key))
+            for key, raw_key in made.items()
+        ]
+        self._write_many(rows, timeout)
+        expires = self.get_backend_timeout(timeout)
+        for key, value, _ in rows:
+            self._l1_set(made[key], key, value, expires)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._l1_delete(key)
+        return self._write(
+            key,
+            self._dumps(value),
+            timeout,
+            delta=self._release(key),
+            only_new=True,
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_delete(self.make_key(key, version=version))
+        return super().touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._l1_delete(self.make_key(key, version=version))
+        super().delete(key, version)
+
+    def has_key(self, key, version=None):
+        full_key = self.make_key(key, version=version)
+        return (
+            self._l1_get(full_key) is not None
+            or super().has_key(key, version)
+        )
+
+    def incr(self, key, delta=1, version=None):
+        self._l1_delete(self.make_key(key, version=version))
+        return super().incr(key, delta, version)
+
+    def clear(self):
+        with self._l1_lock:
+            self._l1.clear()
+        super().clear()
@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Повторы запроса, упёршегося в блокировку базы: пауза растёт вдвое
+# от LOCK_RETRY_DELAY, к ней добавляется случайная доля, чтобы
+# воркеры не просыпались одновременно
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 0.05
+
+
+def is_locked(error):
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_locked(execute, sql, params, many, context):
+    """Обёртка execute: повторяет запрос при «database is locked».
+
+    Повторяется только запрос вне транзакции. Внутри atomic() блокировка
+    после чтения значит, что транзакцию надо начинать заново, а повтор
+    одного запроса не поможет.
+    """
+    connection = context['connection']
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if (
+                attempt == LOCK_RETRIES
+                or connection.in_atomic_block
+                or not is_locked(error)
+            ):
+                raise
+        delay = LOCK_RETRY_DELAY * 2 ** attempt
+        time.sleep(delay + random.uniform(0, delay))
+
+
+def configure(connection):
+    """Прагмы производственного режима и повторы при блокировках."""
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    if retry_locked not in connection.execute_wrappers:
+        # в начало списка: execute_wrapper() в PerformanceMiddleware
+        # снимает при выходе последнюю обёртку, а не эту
+        connection.execute_wrappers.insert(0, retry_locked)
+
+
+@receiver(connection_created)
+def apply_production_mode(sender, connection, **kwargs):
+    # база в DATABASES может переопределить общий режим своим ключом
+    enabled = connection.settings_dict.get(
+        'SQLITE_PRODUCTION', settings.SQLITE_PRODUCTION
+    )
+    if connection.vendor == 'sqlite' and enabled:
+        configure(connection)
@@ -0,0 +1,195 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import F
+from django.utils import timezone
+
+from posts.management.commands.benchmark import percentile
+from posts.models import Comment, Post
+
+MODES = ('default', 'production')
+
+
+class Worker(threading.Thread):
+    """Поток нагрузки: чтения ленты вперемешку с комментариями."""
+
+    def __init__(self, alias, mode, deadline, options, post_ids, user_ids,
+                 number):
+        super().__init__(name=f'benchmark-{mode}-{number}')
+        self.alias = alias
+        self.persistent = mode == 'production'
+        self.deadline = deadline
+        self.write_ratio = options['write_ratio']
+        self.post_ids = post_ids
+        self.user_ids = user_ids
+        self.random = random.Random(options['seed'] + number)
+        self.reads = []
+        self.writes = []
+        self.errors = 0
+
+    def run(self):
+        connection = connections[self.alias]
+        try:
+            while time.monotonic() < self.deadline:
+                write = self.random.random() < self.write_ratio
+                started = time.perf_counter()
+                try:
+                    if write:
+                        self.write()
+                    else:
+                        self.read()
+                except OperationalError:
+                    self.errors += 1
+                else:
+                    elapsed = time.perf_counter() - started
+                    (self.writes if write else self.reads).append(elapsed)
+                if not self.persistent:
+                    # как при CONN_MAX_AGE = 0: соединение на каждый запрос
+                    connection.close()
+        finally:
+            connection.close()
+
+    def read(self):
+        list(
+            Post.objects.using(self.alias)
+            .select_related('author', 'group').order_by('-pub_date')[:10]
+        )
+
+    def write(self):
+        # без ORM-сохранения: сигналы модели пишут в основную базу
+        post_id = self.random.choice(self.post_ids)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {Comment._meta.db_table} '
+                '(post_id, author_id, text, created) VALUES (%s, %s, %s, %s)',
+                [post_id, self.random.choice(self.user_ids), 'benchmark',
+                 timezone.now()],
+            )
+        Post.objects.using(self.alias).filter(id=post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает SQLite в обычном и производственном режиме '
+        '(SQLITE_PRAGMAS, постоянные соединения, повторы) под нагрузкой '
+        'из нескольких потоков на копии основной базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Секунд нагрузки на каждый режим.'
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи.'
+        )
+        parser.add_argument(
+            '--mode', choices=MODES + ('both',), default='both'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Файл для отчёта в JSON; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite.')
+        post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+        user_ids = list(
+            Post.objects.values_list('author_id', flat=True).distinct()[:100]
+        )
+        if not post_ids:
+            raise CommandError('В базе нет постов: сначала запустите seed.')
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        report = {
+            'threads': options['threads'],
+            'duration': options['duration'],
+            'write_ratio': options['write_ratio'],
+            'modes': {},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in modes:
+                path = os.path.join(directory, f'{mode}.sqlite3')
+                # каждый режим получает свою свежую копию
+                with source.cursor() as cursor:
+                    cursor.execute('VACUUM INTO %s', [path])
+                report['modes'][mode] = self.run(
+                    mode, path, options, post_ids, user_ids
+                )
+        if len(modes) == 2:
+            default, production = (report['modes'][mode] for mode in MODES)
+            if default['ops_per_second']:
+                report['speedup'] = round(
+                    production['ops_per_second'] / default['ops_per_second'],
+                    2,
+                )
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        self.stdout.write(self.style.SUCCESS(
+            '; '.join(
+                f'{mode}: {result["ops_per_second"]} оп/с, '
+                f'ошибок {result["errors"]}'
+                for mode, result in report['modes'].items()
+            )
+        ))
+
+    def run(self, mode, path, options, post_ids, user_ids):
+        alias = f'benchmark_{mode}'
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'SQLITE_PRODUCTION': mode == 'production',
+        }
+        if mode == 'default':
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = DELETE')
+            connections[alias].close()
+        deadline = time.monotonic() + options['duration']
+        started = time.monotonic()
+        workers = [
+            Worker(alias, mode, deadline, options, post_ids, user_ids, number)
+            for number in range(options['threads'])
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            del connections.databases[alias]
+        elapsed = time.monotonic() - started
+        reads = [value for worker in workers for value in worker.reads]
+        writes = [value for worker in workers for value in worker.writes]
+        return {
+            'ops_per_second': round((len(reads) + len(writes)) / elapsed, 1),
+            'reads': len(reads),
+            'writes': len(writes),
+            'errors': sum(worker.errors for worker in workers),
+            'read_p95_ms': self.ms(reads, 95),
+            'write_p95_ms': self.ms(writes, 95),
+            'read_mean_ms': (
+                round(statistics.mean(reads) * 1000, 2) if reads else None
+            ),
+        }
+
+    @staticmethod
+    def ms(values, percent):
+        if not values:
+            return None
+        return round(percentile(values, percent) * 1000, 2)
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит журнал WAL в файл базы SQLite (checkpoint) и обновляет '
+        'статистику планировщика (ANALYZE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Псевдоним базы; по умолчанию default.'
+        )
+        parser.add_argument(
+            '--checkpoint', default='TRUNCATE',
+            choices=('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE', 'NONE'),
+            help='Режим wal_checkpoint; TRUNCATE заодно обнуляет файл '
+                 '-wal, NONE — не делать checkpoint.'
+        )
+        parser.add_argument(
+            '--no-analyze', action='store_true',
+            help='Не запускать ANALYZE.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; по умолчанию один раз.'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда обслуживает только SQLite.')
+        while True:
+            with connection.cursor() as cursor:
+                if options['checkpoint'] != 'NONE':
+                    cursor.execute(
+                        f'PRAGMA wal_checkpoint({options["checkpoint"]})'
+                    )
+                    busy, wal_pages, moved = cursor.fetchone()
+                    self.stdout.write(
+                        f'Checkpoint: страниц в WAL {wal_pages}, '
+                        f'перенесено {moved}'
+                        + (', не завершён: база занята' if busy else '')
+                    )
+                if not options['no_analyze']:
+                    started = time.monotonic()
+                    cursor.execute('ANALYZE')
+                    # PRAGMA optimize запоминает, что статистика свежая
+                    cursor.execute('PRAGMA optimize')
+                    self.stdout.write(
+                        f'ANALYZE: {time.monotonic() - started:.2f} с'
+                    )
+            self.stdout.write(self.style.SUCCESS('Обслуживание завершено'))
+            if options['interval'] <= 0:
+                return
+            connection.close()
+            time.sleep(options['interval'])
@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import routers
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из REPLICA_FILES '
+        '— локальная замена репликации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; по умолчанию один раз.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICAS:
+            raise CommandError('Реплики не настроены: REPLICA_FILES пуст.')
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replicas умеет копировать только SQLite.')
+        while True:
+            started = time.monotonic()
+            for alias in settings.REPLICAS:
+                path = connections[alias].settings_dict['NAME']
+                temporary = f'{path}.tmp'
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                # VACUUM INTO пишет согласованный снимок в новый файл,
+                # а os.replace подменяет реплику целиком: читатели видят
+                # либо старую копию, либо новую, но не половину
+                snapshot = time.time()
+                with primary.cursor() as cursor:
+                    cursor.execute('VACUUM INTO %s', [temporary])
+                connections[alias].close()
+                os.replace(temporary, path)
+                # теперь реплика содержит всё, что записано до снимка
+                routers.mark_synced(alias, snapshot)
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплик обновлено: {len(settings.REPLICAS)} за '
+                f'{time.monotonic() - started:.2f} с'
+            ))
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,172 @@
+import bisect
+import threading
+from collections import defaultdict
+
+# Метрики запросов: сколько времени ушло на SQL, шаблоны и кеш.
+# Счётчики текущего запроса живут в threading.local, а накопленные
+# гистограммы — в памяти процесса, так что каждый воркер отдаёт
+# в /metrics свои числа, а суммирует их Prometheus.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def start():
+    _local.current = RequestMetrics()
+    return _local.current
+
+
+def stop():
+    _local.current = None
+
+
+def current():
+    """Счётчики текущего запроса или ``None`` вне запроса."""
+    return getattr(_local, 'current', None)
+
+
+def record_query(duration):
+    metrics = current()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.sql_time += duration
+
+
+def record_template(duration):
+    metrics = current()
+    if metrics is not None:
+        metrics.template_time += duration
+
+
+def record_cache(hit):
+    metrics = current()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """Пары (le, накопленное число) в формате Prometheus."""
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield _format(bound), total
+        yield '+Inf', total + self.counts[-1]
+
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время ответа на запрос.', DURATION_BUCKETS
+    ),
+    'yatube_request_sql_seconds': (
+        'Время SQL-запросов за запрос.', DURATION_BUCKETS
+    ),
+    'yatube_request_template_seconds': (
+        'Время рендера шаблонов за запрос, вместе с SQL внутри шаблона.',
+        DURATION_BUCKETS,
+    ),
+    'yatube_request_queries': (
+        'Число SQL-запросов за запрос.', QUERY_BUCKETS
+    ),
+}
+COUNTERS = {
+    'yatube_responses_total': 'Ответы по представлениям и кодам.',
+    'yatube_cache_requests_total': 'Обращения к кешу: попадания и промахи.',
+}
+
+_histograms = defaultdict(dict)
+_counters = defaultdict(lambda: defaultdict(int))
+
+
+def observe(view, status, duration, metrics):
+    """Добавляет завершённый запрос к метрикам процесса."""
+    values = {
+        'yatube_request_duration_seconds': duration,
+        'yatube_request_sql_seconds': metrics.sql_time,
+        'yatube_request_template_seconds': metrics.template_time,
+        'yatube_request_queries': metrics.queries,
+    }
+    with _lock:
+        for name, value in values.items():
+            histogram = _histograms[name].get(view)
+            if histogram is None:
+                histogram = Histogram(HISTOGRAMS[name][1])
+                _histograms[name][view] = histogram
+            histogram.observe(value)
+        _counters['yatube_responses_total'][(view, str(status))] += 1
+        cache = _counters['yatube_cache_requests_total']
+        cache[(view, 'hit')] += metrics.cache_hits
+        cache[(view, 'miss')] += metrics.cache_misses
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def render():
+    """Метрики процесса в текстовом формате Prometheus 0.0.4."""
+    lines = []
+    with _lock:
+        for name, (description, _) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for view, histogram in sorted(_histograms[name].items()):
+                label = f'view="{_escape(view)}"'
+                for bound, count in histogram.samples():
+                    lines.append(
+                        f'{name}_bucket{{{label},le="{bound}"}} {count}'
+                    )
+                lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                lines.append(f'{name}_count{{{label}}} {count}')
+        labels = {
+            'yatube_responses_total': 'status',
+            'yatube_cache_requests_total': 'result',
+        }
+        for name, description in COUNTERS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            for (view, value), total in sorted(_counters[name].items()):
+                lines.append(
+                    f'{name}{{view="{_escape(view)}",'
+                    f'{labels[name]}="{value}"}} {total}'
+                )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,89 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+
+def _timed_execute(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - started)
+
+
+class PerformanceMiddleware:
+    """Считает время, SQL, шаблоны и кеш каждого запроса.
+
+    Итоги уходят в заголовок ``Server-Timing`` (если включён
+    SERVER_TIMING) и в метрики процесса, которые отдаёт /metrics.
+    Стоит первым в MIDDLEWARE, чтобы учесть и запросы сессий.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe(view, response.status_code, duration, request_metrics)
+        if getattr(settings, 'SERVER_TIMING', False):
+            response['Server-Timing'] = self.server_timing(
+                duration, request_metrics
+            )
+        return response
+
+    def server_timing(self, duration, request_metrics):
+        return ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'sql;dur={request_metrics.sql_time * 1000:.1f};'
+            f'desc="{request_metrics.queries} queries"',
+            f'tpl;dur={request_metrics.template_time * 1000:.1f}',
+            f'cache;desc="{request_metrics.cache_hits} hits, '
+            f'{request_metrics.cache_misses} misses"',
+        ])
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет за основной базой запросы после записи.
+
+    Небезопасные методы и все запросы клиента в течение
+    REPLICA_PIN_SECONDS после его записи читают из основной базы
+    (read-your-writes); остальные читают с реплик. Срок хранится
+    в cookie, так что решение не стоит ни одного запроса к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        routers.start(use_replicas=safe and not pinned)
+        try:
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        finally:
+            routers.stop()
+        if settings.REPLICAS and (wrote or not safe):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+# Состояние текущего запроса: читать ли с реплик и была ли запись.
+# Вне запроса (команды, фоновые потоки) всё идёт в основную базу.
+_local = threading.local()
+
+PRIMARY = 'default'
+
+# Время последней записи в основную базу и начала снимка каждой реплики
+# (см. sync_replicas). Ключи общие для всех процессов и обходят L1.
+LAST_WRITE_KEY = 'core:replicas:last_write'
+# Запись отмечается до выполнения запроса, а коммит наступает чуть
+# позже: снимок считается начатым на столько секунд раньше
+SYNC_MARGIN = 1.0
+
+
+def synced_key(alias):
+    return f'core:replicas:synced:{alias}'
+
+
+def start(use_replicas):
+    _local.use_replicas = use_replicas
+    _local.wrote = False
+    _local.stale = False
+
+
+def stop():
+    _local.use_replicas = False
+
+
+def wrote():
+    """Писал ли текущий запрос в основную базу."""
+    return getattr(_local, 'wrote', False)
+
+
+def mark_write():
+    cache.set(LAST_WRITE_KEY, time.time(), None)
+
+
+def mark_synced(alias, started):
+    """Запоминает, что реплика содержит всё записанное до ``started``."""
+    cache.set(synced_key(alias), started - SYNC_MARGIN, None)
+
+
+def fresh_replicas():
+    """Реплики, снятые после последней записи в основную базу.
+
+    Пока неизвестно, когда была последняя запись (например, после
+    очистки кеша), свежей не считается ни одна.
+    """
+    keys = {synced_key(alias): alias for alias in settings.REPLICAS}
+    values = cache.get_many([LAST_WRITE_KEY, *keys])
+    last_write = values.get(LAST_WRITE_KEY)
+    if last_write is None:
+        return []
+    return [
+        alias for key, alias in keys.items()
+        if values.get(key, last_write - 1) >= last_write
+    ]
+
+
+class PrimaryReplicaRouter:
+    """Пишет в основную базу, читает с реплик из settings.REPLICAS.
+
+    На реплики уходят только чтения безопасных запросов, которые не
+    закреплены за основной базой (см. ReplicaPinningMiddleware). После
+    первой записи запрос до конца читает из основной базы, чтобы видеть
+    своё.
+
+    Реплика читается, только если её снимок новее последней записи:
+    страницы кешируют фрагменты, ETag и ленты под поколениями, которые
+    запись уже сдвинула, и данные старее поколения застряли бы в кеше.
+    Свежесть проверяется при каждом чтении, то есть после того, как
+    представление прочитало поколение своего кеша.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if (
+            not settings.REPLICAS
+            or not getattr(_local, 'use_replicas', False)
+            or wrote()
+            or _local.stale
+        ):
+            return PRIMARY
+        replicas = fresh_replicas()
+        if not replicas:
+            # до конца запроса: реплики не догонят основную базу
+            _local.stale = True
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        if settings.REPLICAS:
+            mark_write()
+            if connections[PRIMARY].in_atomic_block:
+                # запись станет видна только после коммита
+                transaction.on_commit(mark_write, using=PRIMARY)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплики получают схему вместе с данными от sync_replicas
+        return db == PRIMARY
@@ -0,0 +1,29 @@
+import copy
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Общий для потоков кеш в памяти процесса: файл cache.sqlite3 пережил бы
+# прогон и отдал бы тестам значения, закешированные по прошлой базе
+TEST_CACHE_LOCATION = 'file:yatube-test-cache?mode=memory&cache=shared'
+
+
+def in_memory_caches():
+    """CACHES из настроек, но в памяти, а не в файле."""
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = TEST_CACHE_LOCATION
+    return caches
+
+
+class TestRunner(DiscoverRunner):
+    """Тесты manage.py test идут на кеше из in_memory_caches()."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.caches_override = override_settings(CACHES=in_memory_caches())
+        self.caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches_override.disable()
+        super().teardown_test_environment(**kwargs)
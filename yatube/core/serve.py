@@ -0,0 +1,197 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+# Файлы с хешем в имени не меняются: браузер может не перепроверять их год
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Файлы без хеша (например, /static/robots.txt) перепроверяются чаще
+STATIC_MAX_AGE = 60 * 60
+# Расширение сжатой копии → Content-Encoding, в порядке предпочтения
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+# Загрузки не переименовываются, но файл с тем же именем может
+# появиться заново, поэтому без immutable
+MEDIA_MAX_AGE = 24 * 60 * 60
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def resolve(root, path):
+    """Абсолютный путь к файлу внутри ``root`` или Http404."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return path, fullpath
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {
+        item.split(';')[0].strip().lower()
+        for item in header.split(',')
+        if not re.search(r';\s*q=0(\.0*)?\s*$', item)
+    }
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """Кусок открытого файла, который FileResponse читает как целый файл."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Первый и последний байт из заголовка Range.
+
+    ``None``, если заголовка нет или он не понят (тогда отдаётся весь
+    файл); RangeNotSatisfiable, если диапазон за концом файла. Несколько
+    диапазонов сразу не поддерживаются: отдаётся весь файл.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def file_response(request, fullpath, content_type=None):
+    """FileResponse с ETag, Last-Modified и поддержкой Range.
+
+    Условные заголовки (If-None-Match, If-Modified-Since и др.) дают 304
+    или 412. Весь файл FileResponse отдаёт через ``wsgi.file_wrapper``,
+    так что сервер может переслать его sendfile, не читая в память
+    Python; кусок по Range читается блоками.
+    """
+    stat = os.stat(fullpath)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if if_range is None or if_range in (etag, http_date(last_modified)):
+        try:
+            byte_range = parse_range(
+                request.META.get('HTTP_RANGE'), stat.st_size
+            )
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        first, last = byte_range
+        length = last - first + 1
+        response = FileResponse(
+            FileRange(file, first, length), content_type=content_type,
+            status=206,
+        )
+        response['Content-Range'] = f'bytes {first}-{last}/{stat.st_size}'
+        response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    """Статика из STATIC_ROOT с заранее сжатыми копиями.
+
+    Если клиент принимает br или gzip и collectstatic положил рядом
+    такую копию, отдаётся она. Файлы с хешем в имени кешируются
+    навсегда (``immutable``).
+    """
+    path, fullpath = resolve(staticfiles_storage.location, path)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = accepted_encodings(request)
+    encoding = None
+    for suffix, name in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            fullpath, encoding = fullpath + suffix, name
+            break
+    response = file_response(request, fullpath, content_type)
+    if encoding and response.status_code in (200, 206):
+        response['Content-Encoding'] = encoding
+    # у файла может быть и сжатая копия, даже если её не отдали сейчас
+    patch_vary_headers(response, ('Accept-Encoding',))
+    is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+    if is_hashed is not None and is_hashed(path):
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Файлы из MEDIA_ROOT: картинки постов и миниатюры sorl.
+
+    Если перед Django стоит прокси, файл отдаёт он: nginx по заголовку
+    X-Accel-Redirect (MEDIA_ACCEL_REDIRECT — префикс internal-локации),
+    Apache или lighttpd по X-Sendfile (MEDIA_X_SENDFILE). Иначе файл
+    отдаёт file_response.
+    """
+    path, fullpath = resolve(settings.MEDIA_ROOT, path)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT + quote(path)
+        )
+    elif settings.MEDIA_X_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+    else:
+        response = file_response(request, fullpath, content_type)
+    response['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}'
+    return response
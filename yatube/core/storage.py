@@ -0,0 +1,82 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него будут только .gz
+    brotli = None
+
+# Что имеет смысл сжимать: картинки PNG/JPEG уже сжаты
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.map', '.json', '.xml',
+)
+# Сжатая копия нужна, только если она хоть немного меньше оригинала
+MIN_SAVING = 0.95
+
+
+def compress_gzip(data):
+    # mtime=0: одинаковый вход даёт одинаковый .gz при каждой сборке
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    """Пары «расширение сжатой копии → функция сжатия»."""
+    result = {'.gz': compress_gzip}
+    if brotli is not None:
+        result['.br'] = compress_brotli
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями.
+
+    collectstatic пишет рядом с каждым файлом с хешем ``.gz`` и, если
+    установлен brotli, ``.br``; core.serve отдаёт их без сжатия на лету.
+    Пока collectstatic не запускался, ссылки ведут на исходные имена.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = {}
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed[hashed_name] = None
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed:
+            for compressed_name in self.compress(hashed_name):
+                yield hashed_name, compressed_name, True
+
+    def compress(self, name):
+        if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, encode in encoders().items():
+            compressed = encode(data)
+            if len(compressed) >= len(data) * MIN_SAVING:
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
+
+    def is_hashed(self, name):
+        """Имя с хешем, которое никогда не поменяет содержимого."""
+        return name in self.hashed_files.values()
@@ -0,0 +1,32 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.record_template(time.perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблоны Django, которые засекают время рендера для метрик.
+
+    Засекается только шаблон, отданный представлению: вложенные
+    ``{% include %}`` рендерятся внутри него и второй раз не считаются.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..cache import TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault('LOCK_WAIT', 1)
+        cache = TieredCache(self.location, {'OPTIONS': options})
+        # свой L1 у каждого экземпляра — как у двух разных процессов
+        cache._l1 = OrderedDict()
+        return cache
+
+    def test_second_tier_is_shared(self):
+        """Значение, записанное одним процессом, видно другому."""
+        first = self.make_cache()
+        second = self.make_cache()
+        first.set('key', {'value': 1})
+        self.assertEqual(second.get('key'), {'value': 1})
+        self.assertTrue(second.add('counter', 1))
+        self.assertFalse(first.add('counter', 5))
+        self.assertEqual(first.incr('counter'), 2)
+        first.delete('key')
+        self.assertIsNone(first.get('key'))
+        self.assertIsNone(self.make_cache().get('key'))
+
+    def test_many_keys_in_one_query(self):
+        """get_many и set_many обходятся одним обращением к L2."""
+        first = self.make_cache()
+        data = {f'key{i}': i for i in range(10)}
+        with mock.patch.object(first, '_write') as write:
+            self.assertEqual(first.set_many(data), [])
+        write.assert_not_called()
+        second = self.make_cache()
+        second.set('key0', 'из L1')
+        with mock.patch.object(
+            second, '_read_many', wraps=second._read_many
+        ) as read_many, mock.patch.object(second, '_read') as read:
+            values = second.get_many([*data, 'missing'])
+        read.assert_not_called()
+        read_many.assert_called_once()
+        # key0 нашёлся в L1 и в запрос к L2 не попал
+        self.assertNotIn(second.make_key('key0'), read_many.call_args[0][0])
+        self.assertEqual(values, {**data, 'key0': 'из L1'})
+        # найденное в L2 легло в L1
+        with mock.patch.object(second, '_read_many') as read_many:
+            self.assertEqual(second.get_many(['key5']), {'key5': 5})
+        read_many.assert_not_called()
+
+    def test_first_tier_is_bounded(self):
+        """L1 хранит не больше L1_MAX_ENTRIES ключей."""
+        cache = self.make_cache(L1_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(len(cache._l1), 2)
+        self.assertEqual(cache.get('a'), 'a')
+
+    def test_first_tier_bypass(self):
+        """Ключи из L1_BYPASS_PREFIXES всегда читаются из общего L2."""
+        first = self.make_cache(L1_BYPASS_PREFIXES=['gen:'])
+        second = self.make_cache(L1_BYPASS_PREFIXES=['gen:'])
+        first.set('gen:global', 1)
+        self.assertEqual(first.get('gen:global'), 1)
+        second.incr('gen:global')
+        self.assertEqual(first.get('gen:global'), 2)
+
+    def test_single_flight(self):
+        """Промах горячего ключа пересчитывает только один клиент."""
+        first = self.make_cache()
+        second = self.make_cache()
+        key = 'template.cache.index_page'
+        self.assertIsNone(first.get(key))
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(
+            second.get(key)
+        ))
+        waiter.start()
+        time.sleep(0.1)
+        first.set(key, 'fragment', 60)
+        waiter.join()
+        self.assertEqual(results, ['fragment'])
+
+    def test_early_expiry(self):
+        """Долгий пересчёт заставляет одного клиента обновить ключ заранее."""
+        first = self.make_cache(EARLY_EXPIRY_BETA=1e9)
+        second = self.make_cache(EARLY_EXPIRY_BETA=1e9)
+        key = 'template.cache.index_page'
+        first.get(key)
+        time.sleep(0.01)
+        first.set(key, 'fragment', 60)
+        self.assertIsNone(second.get(key))
+        self.assertEqual(first.get(key), 'fragment')
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import Client, TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.name = default_storage.save(
+            'posts/file.jpg', ContentFile(CONTENT)
+        )
+        cls.url = settings.MEDIA_URL + cls.name
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с ETag и Accept-Ranges."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_ranges(self):
+        """Range отдаёт нужный кусок со статусом 206."""
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=1000-': (1000, len(CONTENT) - 1),
+            'bytes=-24': (len(CONTENT) - 24, len(CONTENT) - 1),
+            'bytes=10-99999': (10, len(CONTENT) - 1),
+        }
+        for header, (first, last) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[first:last + 1]
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {first}-{last}/{len(CONTENT)}'
+                )
+                self.assertEqual(
+                    response['Content-Length'], str(last - first + 1)
+                )
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        """Диапазон за концом файла — 416, непонятный игнорируется."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+        for header in ('bytes=0-1,5-6', 'lines=1-2', 'bytes=9-1'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        """304 по ETag; If-Range с чужим ETag отдаёт весь файл."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, 206)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        """С прокси nginx файл отдаётся заголовком X-Accel-Redirect."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/' + self.name
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_X_SENDFILE=True)
+    def test_x_sendfile(self):
+        """С X-Sendfile в заголовке путь к файлу."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Sendfile'], default_storage.path(self.name)
+        )
+
+    def test_missing_and_outside(self):
+        """Нет файла или путь вне MEDIA_ROOT — 404."""
+        for path in ('posts/missing.jpg', '../manage.py', 'posts'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 405)
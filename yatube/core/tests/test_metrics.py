@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing(self):
+        """Ответ несёт разбивку времени в заголовке Server-Timing."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('total;dur=', 'sql;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        """Без SERVER_TIMING заголовка нет."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint(self):
+        """/metrics отдаёт гистограммы и счётчики по представлениям."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertTrue(
+            response['Content-Type'].startswith('text/plain; version=0.0.4')
+        )
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_request_queries_bucket{view="posts:index",le="+Inf"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_responses_total{view="posts:index",status="200"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{view="posts:index",result="hit"}',
+            text,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint_is_private(self):
+        """Чужим адресам /metrics не отдаётся."""
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='203.0.113.5'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics_endpoint_disabled_by_default(self):
+        """Без токена и адресов /metrics закрыт даже для localhost."""
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_token(self):
+        """С METRICS_TOKEN нужен заголовок Authorization с ним."""
+        url = reverse('metrics')
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        response = self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_counters(self):
+        """Попадания и промахи кеша попадают в счётчики запроса."""
+        request_metrics = metrics.start()
+        try:
+            cache.get('missing')
+            cache.set('present', 1)
+            cache.get('present')
+        finally:
+            metrics.stop()
+        self.assertEqual(request_metrics.cache_hits, 1)
+        self.assertEqual(request_metrics.cache_misses, 1)
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        """Бакеты гистограммы считаются нарастающим итогом."""
+        histogram = metrics.Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(
+            list(histogram.samples()), [('1', 2), ('5', 3), ('+Inf', 4)]
+        )
+        self.assertEqual(histogram.sum, 14.5)
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import routers
+from ..middleware import ReplicaPinningMiddleware
+
+User = get_user_model()
+
+
+@override_settings(REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.routed = None
+        cache.clear()
+        # реплика снята после последней записи
+        routers.mark_write()
+        routers.mark_synced('replica1', time.time() + routers.SYNC_MARGIN)
+
+    def tearDown(self):
+        routers.stop()
+
+    def view(self, write=False):
+        def get_response(request):
+            if write:
+                self.router.db_for_write(User)
+            self.routed = self.router.db_for_read(User)
+            return HttpResponse()
+        return ReplicaPinningMiddleware(get_response)
+
+    def test_router(self):
+        """Чтения в запросе идут на реплику, после записи — в основную."""
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        routers.start(use_replicas=True)
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        routers.stop()
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+    def test_stale_replica(self):
+        """Реплика старее последней записи не читается до конца запроса."""
+        routers.start(use_replicas=True)
+        routers.mark_write()
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        # догнавшая реплика достанется только следующему запросу
+        routers.mark_synced('replica1', time.time() + routers.SYNC_MARGIN)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        routers.start(use_replicas=True)
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+        cache.clear()
+        routers.start(use_replicas=True)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_get_reads_replica(self):
+        """Обычный GET читает с реплики и ничего не закрепляет."""
+        response = self.view()(self.factory.get('/'))
+        self.assertEqual(self.routed, 'replica1')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client(self):
+        """После записи клиент получает cookie и читает из основной."""
+        for request, write in (
+            (self.factory.post('/'), False),
+            (self.factory.get('/'), True),
+        ):
+            with self.subTest(method=request.method):
+                response = self.view(write)(request)
+                self.assertEqual(self.routed, 'default')
+                cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+                self.assertEqual(
+                    cookie['max-age'], settings.REPLICA_PIN_SECONDS
+                )
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = '1'
+        self.view()(request)
+        self.assertEqual(self.routed, 'default')
+
+    @override_settings(REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик всё идёт в основную базу, cookie не ставится."""
+        response = self.view()(self.factory.post('/'))
+        self.assertEqual(self.routed, 'default')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+
+@override_settings(REPLICAS=['replica1'])
+class SyncReplicasTests(TransactionTestCase):
+    # VACUUM INTO не работает внутри транзакции, в которой идёт TestCase
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.path,
+        }
+
+    def tearDown(self):
+        connections['replica1'].close()
+        # иначе следующий тест получит соединение со старым файлом
+        del connections['replica1']
+        del connections.databases['replica1']
+        os.remove(self.path)
+
+    def test_sync_copies_primary(self):
+        """sync_replicas копирует в реплику данные основной базы."""
+        User.objects.create_user(username='copied')
+        call_command('sync_replicas', stdout=StringIO())
+        replica = sqlite3.connect(self.path)
+        try:
+            usernames = [row[0] for row in replica.execute(
+                'SELECT username FROM auth_user'
+            )]
+        finally:
+            replica.close()
+        self.assertEqual(usernames, ['copied'])
+
+
+@override_settings(REPLICAS=['replica1'])
+class LaggingReplicaPageTests(TransactionTestCase):
+    """Кешируемые страницы не собираются из отстающей реплики."""
+
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.path,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.databases['replica1']
+        os.remove(cls.path)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        call_command('sync_replicas', stdout=StringIO())
+
+    @mock.patch.object(routers, 'SYNC_MARGIN', 0)
+    def test_new_post_survives_sync(self):
+        """Пост, созданный до синхронизации, не пропадает из кеша главной."""
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'Свежий пост')
+        call_command('sync_replicas', stdout=StringIO())
+        self.assertEqual(routers.fresh_replicas(), ['replica1'])
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'Свежий пост')
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from posts.models import Post
+
+from .. import db
+
+User = get_user_model()
+
+
+class RetryLockedTests(TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.context = {'connection': connection}
+
+    def locked_twice(self, sql, params, many, context):
+        self.calls += 1
+        if self.calls <= 2:
+            raise OperationalError('database is locked')
+        return 'ok'
+
+    @mock.patch('core.db.time.sleep')
+    def test_retries_outside_transaction(self, sleep):
+        """Вне транзакции запрос повторяется с растущей паузой."""
+        with mock.patch.object(connection, 'in_atomic_block', False):
+            result = db.retry_locked(
+                self.locked_twice, 'SELECT 1', None, False, self.context
+            )
+        self.assertEqual(result, 'ok')
+        self.assertEqual(self.calls, 3)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertGreater(second, first)
+
+    def test_no_retry_inside_transaction(self):
+        """Внутри atomic() ошибка блокировки отдаётся сразу."""
+        with self.assertRaises(OperationalError):
+            db.retry_locked(
+                self.locked_twice, 'SELECT 1', None, False, self.context
+            )
+        self.assertEqual(self.calls, 1)
+
+
+class SqliteProductionTests(TransactionTestCase):
+    # прагмы, VACUUM INTO и ANALYZE не работают внутри транзакции TestCase
+
+    @override_settings(SQLITE_PRAGMAS={
+        'synchronous': 'NORMAL', 'busy_timeout': 1234,
+    })
+    def test_configure(self):
+        """configure ставит прагмы и обёртку повторов один раз."""
+        wrappers = list(connection.execute_wrappers)
+        try:
+            db.configure(connection)
+            db.configure(connection)
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout')
+                self.assertEqual(cursor.fetchone()[0], 1234)
+                cursor.execute('PRAGMA synchronous')
+                self.assertEqual(cursor.fetchone()[0], 1)
+            self.assertEqual(
+                connection.execute_wrappers.count(db.retry_locked), 1
+            )
+        finally:
+            connection.execute_wrappers[:] = wrappers
+
+    def test_maintenance(self):
+        """Команда обслуживания делает checkpoint и ANALYZE."""
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('Checkpoint', out.getvalue())
+        self.assertIn('ANALYZE', out.getvalue())
+
+    def test_benchmark(self):
+        """Замер гоняет оба режима на копиях и не трогает основную базу."""
+        user = User.objects.create_user(username='author')
+        Post.objects.create(author=user, text='Пост')
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            call_command(
+                'benchmark_sqlite', threads=2, duration=0.2,
+                write_ratio=0.5, output=path, stdout=StringIO(),
+            )
+            with open(path) as file:
+                report = json.load(file)
+        finally:
+            os.remove(path)
+        self.assertEqual(set(report['modes']), {'default', 'production'})
+        for result in report['modes'].values():
+            self.assertGreater(result['reads'] + result['writes'], 0)
+        self.assertIn('speedup', report)
+        self.assertEqual(Post.objects.get().comments_count, 0)
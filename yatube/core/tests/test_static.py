@@ -0,0 +1,90 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic пишет файлы с хешем и сжатые копии."""
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        path = staticfiles_storage.path(self.css)
+        with open(path, 'rb') as original, \
+                gzip.open(path + '.gz') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        # PNG уже сжат, копия ему не нужна
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(
+            os.path.exists(staticfiles_storage.path(logo) + '.gz')
+        )
+
+    def test_templates_link_hashed_names(self):
+        """Шаблоны ссылаются на статику с хешем."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, settings.STATIC_URL + self.css)
+
+    def test_serves_precompressed_immutable(self):
+        """Клиенту с gzip отдаётся сжатая копия с immutable."""
+        response = self.client.get(
+            settings.STATIC_URL + self.css, HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open(self.css) as file:
+            self.assertEqual(body, file.read())
+
+    def test_serves_plain_without_accept_encoding(self):
+        """Без Accept-Encoding файл отдаётся как есть."""
+        response = self.client.get(settings.STATIC_URL + self.css)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get(
+            settings.STATIC_URL + self.css, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unhashed_name_is_not_immutable(self):
+        """Имя без хеша кешируется ненадолго."""
+        response = self.client.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_not_modified_and_missing(self):
+        """304 по If-Modified-Since, 404 вне STATIC_ROOT."""
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(settings.STATIC_URL + '../manage.py')
+        self.assertEqual(response.status_code, 404)
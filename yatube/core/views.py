@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
 
 
 def page_not_found(request, exception):
@@ -7,3 +12,31 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    """Пускать ли к /metrics: по токену и/или адресу из настроек.
+
+    Пока не задан ни METRICS_TOKEN, ни METRICS_ALLOWED_IPS, эндпоинт
+    выключен. Если задано и то и другое, нужны оба.
+    """
+    token = settings.METRICS_TOKEN
+    allowed_ips = settings.METRICS_ALLOWED_IPS
+    if not token and not allowed_ips:
+        return False
+    if allowed_ips and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return False
+    if token:
+        return constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+    return True
+
+
+def metrics_view(request):
+    """Метрики процесса для Prometheus (доступ — см. metrics_allowed)."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
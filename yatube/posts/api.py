@@ -0,0 +1,217 @@
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+
+from . import generations, timeline
+from .models import Comment, Post
+from .paginator import CursorPaginator
+from .views import (
+    COMMENTS_PER_PAGE, POSTS_PER_PAGE, conditional, get_author, get_group,
+    group_etag, index_etag, make_etag, profile_etag
+)
+
+# Поля поста в API → поле для values(); связанные модели
+# присоединяются, только если их поле запрошено
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+# Без них не построить курсор
+CURSOR_FIELDS = ('pub_date', 'id')
+COMMENT_ORDERING = ('created', 'id')
+MAX_LIMIT = 100
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_view(view):
+    """Ошибки API отдаются в JSON, а не HTML-страницами."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse({'error': 'Только чтение.'}, status=405)
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Не найдено.'}, status=404)
+    return wrapper
+
+
+def login_required(view):
+    """Гостю 401, а не редирект на страницу входа."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Нужна авторизация.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def get_fields(request, available):
+    """Поля из ``?fields=a,b``; по умолчанию все."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(available))
+    if unknown:
+        raise BadRequest(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(available)}.'
+        )
+    return fields
+
+
+def get_limit(request, default=POSTS_PER_PAGE):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def serialize(row, fields, mapping):
+    data = {}
+    for name in fields:
+        value = row[mapping[name]]
+        if name == 'image':
+            value = default_storage.url(value) if value else None
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def feed_etag(etag_func):
+    """ETag ленты API с учётом числа комментариев.
+
+    Новый комментарий сдвигает только поколение поста, а не лент, так
+    что с полем comments_count в ETag входит ещё и поколение COMMENTS.
+    """
+    @wraps(etag_func)
+    def wrapper(request, *args, **kwargs):
+        etag = etag_func(request, *args, **kwargs)
+        if 'comments_count' in get_fields(request, POST_FIELDS):
+            etag = make_etag(
+                request, etag,
+                generations.get_version(generations.COMMENTS),
+            )
+        return etag
+    return wrapper
+
+
+def feed_response(request, queryset):
+    """Страница ленты: словари из values(), без моделей и шаблонов."""
+    fields = get_fields(request, POST_FIELDS)
+    lookups = {POST_FIELDS[name] for name in fields} | set(CURSOR_FIELDS)
+    paginator = CursorPaginator(
+        queryset.values(*lookups), get_limit(request)
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize(row, fields, POST_FIELDS) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+@api_view
+@conditional(feed_etag(index_etag))
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@api_view
+@conditional(feed_etag(group_etag))
+def group_posts(request, slug):
+    group = get_group(request, slug)
+    return feed_response(request, group.posts_group.all())
+
+
+@api_view
+@conditional(feed_etag(profile_etag))
+def profile(request, username):
+    author = get_author(request, username)
+    return feed_response(request, Post.objects.filter(author=author))
+
+
+@api_view
+@login_required
+def follow_index(request):
+    return feed_response(request, timeline.get_feed(request.user))
+
+
+def get_post_row(request, post_id):
+    # строку поста читают и ETag, и само представление
+    if not hasattr(request, 'posts_api_post'):
+        fields = get_fields(request, POST_FIELDS)
+        lookups = {POST_FIELDS[name] for name in fields}
+        row = (
+            Post.objects.filter(pk=post_id)
+            .values('author_id', 'group_id', *lookups).first()
+        )
+        if row is None:
+            raise Http404
+        request.posts_api_post = fields, row
+    return request.posts_api_post
+
+
+def post_etag(request, post_id):
+    _, row = get_post_row(request, post_id)
+    return make_etag(
+        request,
+        generations.get_version(generations.POST, post_id),
+        generations.get_version(generations.AUTHOR, row['author_id']),
+        generations.get_version(generations.GROUP, row['group_id']),
+    )
+
+
+@api_view
+@conditional(post_etag)
+def post_detail(request, post_id):
+    """Пост и страница его комментариев, от старых к новым.
+
+    Следующую страницу комментариев отдаёт ссылка ``comments_next``
+    (``?cursor=``), её размер задаёт ``?limit=``.
+    """
+    fields, row = get_post_row(request, post_id)
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(
+            *COMMENT_FIELDS.values()
+        ),
+        get_limit(request, COMMENTS_PER_PAGE),
+        ordering=COMMENT_ORDERING,
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    data = serialize(row, fields, POST_FIELDS)
+    data['comments'] = [
+        serialize(comment, COMMENT_FIELDS, COMMENT_FIELDS)
+        for comment in page
+    ]
+    data['comments_next'] = page_url(request, page.next_cursor)
+    data['comments_previous'] = page_url(request, page.previous_cursor)
+    return JsonResponse(data)
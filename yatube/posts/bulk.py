@@ -0,0 +1,27 @@
+from django.db import connections, router
+from django.db.models import Max
+
+
+def lock_for_write(model):
+    """Берёт блокировку записи базы ``model`` в начале atomic().
+
+    atomic() в SQLite открывает отложенную транзакцию: до первой записи
+    другие соединения могут писать, и id, прочитанный через next_id,
+    к моменту bulk_create окажется занят. Пустой UPDATE сразу занимает
+    блокировку записи, так что вызывать его надо первым запросом
+    транзакции — до любого чтения.
+    """
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {table} SET {column} = {column} WHERE 0')
+
+
+def next_id(model):
+    """Первый свободный id для bulk_create с явными id.
+
+    SQLite не возвращает id из bulk_create, поэтому id назначаются
+    заранее, от ``Max(id) + 1``. Безопасно только под lock_for_write.
+    """
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
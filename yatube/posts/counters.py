@@ -0,0 +1,85 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import generations
+from .models import Comment, Follow, Post, Profile, User
+
+
+def _shift(name, delta):
+    """``F(name) + delta``, не опускающийся ниже нуля.
+
+    Строки, вставленные через bulk_create, сигналов не шлют, и счётчик
+    до reconcile_counters может быть меньше настоящего. Уменьшать его
+    ниже нуля нельзя: столбцы беззнаковые, и удаление упало бы на CHECK.
+    """
+    if delta < 0:
+        return Greatest(F(name) + delta, 0)
+    return F(name) + delta
+
+
+def bump(user_id, **deltas):
+    """Атомарно сдвигает счётчики профиля: ``bump(1, posts_count=1)``."""
+    Profile.objects.filter(user_id=user_id).update(
+        **{name: _shift(name, delta) for name, delta in deltas.items()}
+    )
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(id=post_id).update(
+        comments_count=_shift('comments_count', delta)
+    )
+
+
+def _count(queryset, field):
+    """Подзапрос ``COUNT(*)`` по ``field = OuterRef(...)``, 0 вместо NULL."""
+    counts = (
+        queryset.filter(**{field: OuterRef('user_id')}).order_by()
+        .values(field).annotate(total=Count('*')).values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_profiles(queryset=None):
+    """Пересчитывает счётчики профилей, возвращает число исправленных.
+
+    Заодно создаёт профили пользователям, у которых их нет.
+    """
+    if queryset is None:
+        Profile.objects.bulk_create(
+            [Profile(user_id=user_id) for user_id in User.objects.filter(
+                profile__isnull=True).values_list('id', flat=True)],
+            ignore_conflicts=True,
+        )
+        queryset = Profile.objects.all()
+    actual = {
+        'posts_count': _count(Post.objects.all(), 'author'),
+        'followers_count': _count(Follow.objects.all(), 'author'),
+        'following_count': _count(Follow.objects.all(), 'user'),
+    }
+    drifted = queryset.annotate(
+        **{f'actual_{name}': value for name, value in actual.items()}
+    ).exclude(
+        **{name: F(f'actual_{name}') for name in actual}
+    ).values_list('pk', flat=True)
+    drifted = list(drifted)
+    Profile.objects.filter(pk__in=drifted).update(**actual)
+    if drifted:
+        # исправленное число подписчиков могло перейти порог популярности
+        generations.bump(generations.POPULAR)
+    return len(drifted)
+
+
+def reconcile_comments():
+    """Пересчитывает число комментариев постов."""
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(total=Count('*')).values('total')
+    )
+    actual = Coalesce(Subquery(counts), 0)
+    drifted = list(
+        Post.objects.annotate(actual=actual)
+        .exclude(comments_count=F('actual'))
+        .values_list('pk', flat=True)
+    )
+    Post.objects.filter(pk__in=drifted).update(comments_count=actual)
+    return len(drifted)
@@ -0,0 +1,121 @@
+import json
+import zipfile
+from itertools import islice
+
+from django.core.files.storage import default_storage
+
+from .models import Comment, Post
+
+# Сколько постов читать из базы за раз: на каждую такую пачку
+# приходится один запрос за комментариями
+CHUNK_SIZE = 500
+# Кусок, которым картинки копируются в архив
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_records(author):
+    """Посты автора с комментариями в формате команды import_posts.
+
+    Посты читаются курсором пачками по CHUNK_SIZE, так что в памяти
+    никогда не бывает больше одной пачки.
+    """
+    posts = (
+        Post.objects.filter(author=author)
+        .select_related('group')
+        .order_by('pub_date', 'id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    while True:
+        chunk = list(islice(posts, CHUNK_SIZE))
+        if not chunk:
+            return
+        comments = {}
+        rows = (
+            Comment.objects.filter(post__in=[post.id for post in chunk])
+            .order_by('created', 'id')
+            .values_list('post', 'author__username', 'text', 'created')
+        )
+        for post_id, username, text, created in rows:
+            comments.setdefault(post_id, []).append({
+                'author': username,
+                'text': text,
+                'created': created.isoformat(),
+            })
+        for post in chunk:
+            yield {
+                'author': author.username,
+                'group': post.group.slug if post.group else None,
+                'group_title': post.group.title if post.group else None,
+                'text': post.text,
+                'pub_date': post.pub_date.isoformat(),
+                'image': post.image.name,
+                'comments': comments.get(post.id, []),
+            }
+
+
+def iter_jsonl(author):
+    """Выгрузка постов автора построчно в JSONL (байты)."""
+    for record in iter_records(author):
+        yield json.dumps(record, ensure_ascii=False).encode() + b'\n'
+
+
+class _Buffer:
+    """Поток без перемотки, куда zipfile пишет архив.
+
+    ZipFile на таком потоке пишет записи с дескрипторами данных, а всё
+    записанное сразу забирается генератором и уходит клиенту.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(author):
+    """ZIP с posts.jsonl и картинками, собираемый на лету.
+
+    Картинки лежат в архиве под ``images/<имя в хранилище>``, поэтому
+    распакованный архив грузится обратно командой
+    ``import_posts posts.jsonl --images-dir images``.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.jsonl', 'w', force_zip64=True) as entry:
+            for line in iter_jsonl(author):
+                entry.write(line)
+                if buffer.chunks:
+                    yield buffer.pop()
+        images = (
+            Post.objects.filter(author=author).exclude(image='')
+            .order_by().values_list('image', flat=True).distinct()
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        for name in images:
+            if not default_storage.exists(name):
+                continue
+            info = zipfile.ZipInfo(f'images/{name}')
+            info.compress_type = zipfile.ZIP_STORED
+            with default_storage.open(name) as source, \
+                    archive.open(info, 'w', force_zip64=True) as entry:
+                for data in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    entry.write(data)
+                    yield buffer.pop()
+    # дескриптор последней записи и центральный каталог архива
+    yield buffer.pop()
+
+
+FORMATS = {
+    'jsonl': (iter_jsonl, 'application/x-ndjson', 'jsonl'),
+    'zip': (iter_zip, 'application/zip', 'zip'),
+}
@@ -0,0 +1,144 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from . import generations
+from .models import Group, Post, User
+
+FEED_SIZE = 20
+# Тело ленты живёт в кеше, пока не сменится поколение её области
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+# Сколько секунд читатель лент может не перепроверять ленту
+FEED_MAX_AGE = 60
+
+
+class PostsFeed(Feed):
+    feed_type = Atom1Feed
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.id})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние посты'
+    subtitle = 'Свежие записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_listing()[:FEED_SIZE]
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def subtitle(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return group.posts_group.for_listing()[:FEED_SIZE]
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: посты {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return (
+            Post.objects.for_listing().filter(author=author)[:FEED_SIZE]
+        )
+
+
+def cached_feed(feed, scope, lookup=None):
+    """Представление ленты: тело из кеша и 304 по ETag.
+
+    Ключ кеша и ETag строятся из поколения области ``scope``, так что
+    лента сбрасывается вместе со страницами, которые показывают те же
+    посты. Лента у всех одна, поэтому сессия не читается и ответ
+    разрешено кешировать и общим прокси.
+    """
+    def get_version(request, **kwargs):
+        if not hasattr(request, 'posts_feed_version'):
+            pk = None
+            if lookup is not None:
+                pk = lookup(**kwargs)
+                if pk is None:
+                    raise Http404
+            request.posts_feed_version = (
+                pk, generations.get_version(scope, pk)
+            )
+        return request.posts_feed_version
+
+    def etag(request, **kwargs):
+        pk, version = get_version(request, **kwargs)
+        return hashlib.md5(f'{scope}:{pk}:{version}'.encode()).hexdigest()
+
+    @condition(etag_func=etag)
+    def render(request, **kwargs):
+        pk, version = get_version(request, **kwargs)
+        key = f'posts:feed:{scope}:{pk}:{version}'
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request, **kwargs)
+            cached = (response.content, response['Content-Type'])
+            cache.set(key, cached, FEED_CACHE_TIMEOUT)
+        return HttpResponse(cached[0], content_type=cached[1])
+
+    def view(request, **kwargs):
+        response = render(request, **kwargs)
+        patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+        return response
+
+    return view
+
+
+def group_id(slug):
+    return Group.objects.filter(slug=slug).values_list('id', flat=True).first()
+
+
+def author_id(username):
+    return (
+        User.objects.filter(username=username)
+        .values_list('id', flat=True).first()
+    )
+
+
+latest_feed = cached_feed(LatestPostsFeed(), generations.GLOBAL)
+group_feed = cached_feed(GroupPostsFeed(), generations.GROUP, group_id)
+author_feed = cached_feed(AuthorPostsFeed(), generations.AUTHOR, author_id)
@@ -0,0 +1,83 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import generations
+from .models import Follow, Profile
+
+# Подписки пользователя живут в кеше, пока не сменится поколение его
+# профиля: его сдвигает каждая подписка и отписка (см. signals)
+FOLLOWING_TIMEOUT = 24 * 60 * 60
+# 64-битные id; массив из 1000 подписок занимает в кеше 8 КБ
+TYPECODE = 'q'
+
+
+def _key(user_id):
+    version = generations.get_version(generations.PROFILE, user_id)
+    return f'posts:following:{user_id}:{version}'
+
+
+def get_following(user_id):
+    """Отсортированный массив id авторов, на которых подписан пользователь."""
+    key = _key(user_id)
+    raw = cache.get(key)
+    following = array(TYPECODE)
+    if raw is None:
+        following.extend(
+            Follow.objects.filter(user_id=user_id).order_by('author_id')
+            .values_list('author_id', flat=True)
+        )
+        cache.set(key, following.tobytes(), FOLLOWING_TIMEOUT)
+    else:
+        following.frombytes(raw)
+    return following
+
+
+def get_popular():
+    """Отсортированный массив id популярных авторов.
+
+    Их немного, и меняется множество, только когда автор пересекает
+    TIMELINE_FANOUT_LIMIT: тогда сигналы сдвигают поколение POPULAR.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    version = generations.get_version(generations.POPULAR)
+    key = f'posts:popular:{limit}:{version}'
+    raw = cache.get(key)
+    popular = array(TYPECODE)
+    if raw is None:
+        popular.extend(
+            Profile.objects.filter(followers_count__gt=limit)
+            .order_by('user_id').values_list('user_id', flat=True)
+        )
+        cache.set(key, popular.tobytes(), FOLLOWING_TIMEOUT)
+    else:
+        popular.frombytes(raw)
+    return popular
+
+
+def contains(ids, value):
+    """Есть ли ``value`` в отсортированном массиве: двоичный поиск."""
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_id):
+    return contains(get_following(user_id), author_id)
+
+
+def intersect(first, second):
+    """Общие id двух отсортированных массивов слиянием за O(n + m)."""
+    result = array(TYPECODE)
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] < second[j]:
+            i += 1
+        elif first[i] > second[j]:
+            j += 1
+        else:
+            result.append(first[i])
+            i += 1
+            j += 1
+    return result
@@ -1,4 +1,5 @@
 from django import forms
+from .images import validate
 from .models import Post, Comment
 
 
@@ -8,6 +9,13 @@ class PostForm(forms.ModelForm):
         fields = ('text', 'group', 'image')
         labels = {'text': 'Текст поста', 'group': 'Выберите группу'}
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # новый файл проверяем; уже сохранённую картинку — нет
+        if image and hasattr(image, 'image'):
+            validate(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,56 @@
+import time
+
+from django.core.cache import cache
+
+# Поколения кеша: фрагмент страницы кешируется вместе с номером
+# поколения своей области, а запись в области просто увеличивает номер.
+# Старые фрагменты никто не удаляет, они становятся недостижимыми и
+# вытесняются по TTL.
+GLOBAL = 'global'
+GROUP = 'group'
+AUTHOR = 'author'
+POST = 'post'
+# шапка профиля: счётчики подписок, которые не видны в лентах
+PROFILE = 'profile'
+# число комментариев постов в лентах API; HTML-ленты его не показывают
+COMMENTS = 'comments'
+# множество популярных авторов (см. timeline.popular_authors)
+POPULAR = 'popular'
+
+
+def _key(scope, pk=None):
+    if pk is None:
+        return f'posts:generation:{scope}'
+    return f'posts:generation:{scope}:{pk}'
+
+
+def _initial():
+    # Стартовое значение не должно совпасть с поколением, которое
+    # было до вытеснения ключа из кеша, поэтому берём время
+    return int(time.time() * 1000)
+
+
+def get_version(scope, pk=None):
+    key = _key(scope, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(scope, pk=None):
+    key = _key(scope, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial(), None)
+
+
+def bump_post(post, old_group_id=None):
+    """Сбрасывает поколения всех страниц, на которых виден пост."""
+    bump(GLOBAL)
+    bump(AUTHOR, post.author_id)
+    bump(POST, post.pk)
+    for group_id in {post.group_id, old_group_id} - {None}:
+        bump(GROUP, group_id)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from . import generations
+from .models import Post
+
+# Сколько байт перекодированной картинки держать в памяти, прежде чем
+# сбросить её во временный файл
+SPOOL_SIZE = 1024 * 1024
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg'}
+SAVE_OPTIONS = {
+    'WEBP': {'method': 4},
+    'JPEG': {'optimize': True, 'progressive': True},
+}
+
+
+def validate(image):
+    """Проверяет загруженную картинку до сохранения поста."""
+    if image.size > settings.POST_IMAGE_MAX_SIZE:
+        raise ValidationError(
+            'Картинка больше %(limit)d МБ.',
+            params={'limit': settings.POST_IMAGE_MAX_SIZE // 1024 // 1024},
+        )
+    # ImageField уже открыл картинку, её размеры читаются из заголовка
+    width, height = image.image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError('Слишком большое разрешение картинки.')
+
+
+def target_format():
+    if settings.POST_IMAGE_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return settings.POST_IMAGE_FORMAT
+
+
+def needs_normalizing(image, fmt):
+    limit = settings.POST_IMAGE_MAX_DIMENSION
+    return (
+        image.format != fmt
+        or max(image.size) > limit
+        or bool(image.info.get('exif'))
+    )
+
+
+def normalize(name):
+    """Уменьшает картинку, убирает EXIF и перекодирует её.
+
+    Возвращает имя итогового файла: новое, если картинку пришлось
+    переписать (старый файл тогда удаляется, а посты переключаются
+    на новый), или прежнее.
+    """
+    fmt = target_format()
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        if getattr(image, 'is_animated', False):
+            return name
+        if not needs_normalizing(image, fmt):
+            return name
+        # поворот из EXIF применяем к пикселям, раз EXIF не сохраним
+        image = ImageOps.exif_transpose(image)
+        limit = settings.POST_IMAGE_MAX_DIMENSION
+        image.thumbnail((limit, limit), Image.LANCZOS)
+        image = convert(image, fmt)
+        with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as output:
+            image.save(
+                output, fmt, quality=settings.POST_IMAGE_QUALITY,
+                **SAVE_OPTIONS[fmt]
+            )
+            output.seek(0)
+            stem = os.path.splitext(name)[0]
+            new_name = default_storage.save(
+                stem + EXTENSIONS[fmt], File(output)
+            )
+    Post.objects.filter(image=name).update(image=new_name)
+    posts = Post.objects.filter(image=new_name).only('author', 'group')
+    for post in posts:
+        generations.bump_post(post)
+    # форма правки, открытая до перекодирования, могла записать старое
+    # имя обратно: такой файл ещё нужен
+    if not Post.objects.filter(image=name).exists():
+        default_storage.delete(name)
+    return new_name
+
+
+def convert(image, fmt):
+    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # прозрачность JPEG не умеет: кладём картинку на белый фон
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+    if fmt == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands()
+                             or image.mode == 'P' else 'RGB')
+    return image
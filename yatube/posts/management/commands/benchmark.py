@@ -0,0 +1,213 @@
+import json
+import math
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.urls import app_name, urlpatterns
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет все страницы posts.urls тестовым клиентом и печатает '
+        'задержки p50/p95/p99, число запросов и время SQL в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько замеров сделать для каждой страницы.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Сколько первых прогонов не учитывать.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для отчёта; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Отчёт прошлой сборки: упасть, если p95 какой-то '
+                 'страницы выросло больше чем в --threshold раз или '
+                 'запросов стало больше.'
+        )
+        parser.add_argument('--threshold', type=float, default=1.2)
+
+    def handle(self, *args, **options):
+        targets = self.targets()
+        clients = {}
+        for role in ('reader', 'author'):
+            clients[role] = Client()
+            clients[role].force_login(targets[role])
+        routes = self.routes(targets)
+        samples = {name: [] for name in routes}
+        # подписки и комментарии меняют базу: после замеров всё откатывается
+        with transaction.atomic():
+            for run in range(options['warmup'] + options['requests']):
+                for name, (role, method, url) in routes.items():
+                    if options['cold']:
+                        cache.clear()
+                    sample = self.measure(clients[role], method, url)
+                    if run >= options['warmup']:
+                        samples[name].append(sample)
+            transaction.set_rollback(True)
+        report = {
+            'requests': options['requests'],
+            'cold': options['cold'],
+            'routes': {
+                name: self.summary(routes[name][2], items)
+                for name, items in samples.items()
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self.compare(report, options['baseline'], options['threshold'])
+
+    def targets(self):
+        """Самые нагруженные объекты: на них страницы и медленнее всего."""
+        author = (
+            User.objects.annotate(total=Count('posts'))
+            .order_by('-total').first()
+        )
+        reader = (
+            User.objects.annotate(total=Count('follower'))
+            .exclude(pk=getattr(author, 'pk', None))
+            .order_by('-total').first()
+        )
+        group = (
+            Group.objects.annotate(total=Count('posts_group'))
+            .order_by('-total').first()
+        )
+        post = (
+            Post.objects.filter(author=author)
+            .order_by('-comments_count').first()
+        )
+        if None in (author, reader, group, post):
+            raise CommandError(
+                'Нужны хотя бы два пользователя, группа и пост: '
+                'заполните базу командой seed.'
+            )
+        word = post.text.split()[0] if post.text.split() else 'пост'
+        return {
+            'author': author,
+            'reader': reader,
+            'group': group,
+            'post': post,
+            'word': word,
+        }
+
+    def routes(self, targets):
+        """Запрос для каждого маршрута posts.urls.
+
+        Маршрут → (чьим клиентом, метод, адрес). Правку поста открывает
+        автор, остальное — читатель, подписанный на многих.
+        """
+        kwargs = {
+            'slug': targets['group'].slug,
+            'username': targets['author'].username,
+            'post_id': targets['post'].id,
+        }
+        routes = {}
+        for pattern in urlpatterns:
+            converters = pattern.pattern.converters
+            url = reverse(
+                f'{app_name}:{pattern.name}',
+                kwargs={name: kwargs[name] for name in converters},
+            )
+            method = 'post' if pattern.name == 'add_comment' else 'get'
+            role = 'author' if pattern.name == 'post_edit' else 'reader'
+            if pattern.name == 'search':
+                url = f'{url}?q={targets["word"]}'
+            routes[pattern.name] = (role, method, url)
+        return routes
+
+    def measure(self, client, method, url):
+        data = {'text': 'Комментарий'} if method == 'post' else None
+        # connection.queries округляет время до миллисекунд, поэтому
+        # запросы считаются и замеряются здесь
+        sql = {'queries': 0, 'time': 0.0}
+
+        def timed(execute, query, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(query, params, many, context)
+            finally:
+                sql['queries'] += 1
+                sql['time'] += time.perf_counter() - started
+
+        with connection.execute_wrapper(timed):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        return {
+            'status': response.status_code,
+            'time': elapsed,
+            'queries': sql['queries'],
+            'sql_time': sql['time'],
+        }
+
+    def summary(self, url, samples):
+        times = [sample['time'] * 1000 for sample in samples]
+        return {
+            'url': url,
+            'status': sorted({sample['status'] for sample in samples}),
+            'p50_ms': round(percentile(times, 50), 2),
+            'p95_ms': round(percentile(times, 95), 2),
+            'p99_ms': round(percentile(times, 99), 2),
+            'mean_ms': round(statistics.mean(times), 2),
+            'queries': max(sample['queries'] for sample in samples),
+            'sql_ms': round(statistics.mean(
+                sample['sql_time'] * 1000 for sample in samples
+            ), 2),
+        }
+
+    def compare(self, report, path, threshold):
+        with open(path) as file:
+            baseline = json.load(file)['routes']
+        regressions = []
+        for name, current in report['routes'].items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * threshold:
+                regressions.append(
+                    f'{name}: p95 {previous["p95_ms"]} → '
+                    f'{current["p95_ms"]} мс'
+                )
+            if current['queries'] > previous['queries']:
+                regressions.append(
+                    f'{name}: запросов {previous["queries"]} → '
+                    f'{current["queries"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно ' + path + ':\n'
+                + '\n'.join(regressions)
+            )
+        self.stderr.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,36 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты автора с комментариями в JSONL или ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=sorted(export.FORMATS), default='jsonl'
+        )
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        generate = export.FORMATS[options['format']][0]
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in generate(author):
+                    file.write(chunk)
+        else:
+            for chunk in generate(author):
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
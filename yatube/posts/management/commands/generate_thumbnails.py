@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие миниатюры для картинок постов.'
+
+    def handle(self, *args, **options):
+        images = (
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        )
+        created = 0
+        for name in images.iterator():
+            if thumbnails.lookup(name) is None:
+                thumbnails.generate(name)
+                created += 1
+        self.stdout.write(self.style.SUCCESS(f'Создано миниатюр: {created}'))
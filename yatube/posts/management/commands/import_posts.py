@@ -0,0 +1,361 @@
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, generations, search, timeline
+from posts.bulk import lock_for_write, next_id
+from posts.models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+def parse_date(value):
+    if not value:
+        return None
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты с комментариями и картинками из JSONL '
+        'или CSV. Прерванную загрузку можно продолжить тем же вызовом. '
+        'Только для SQLite: id новых строк назначаются от Max(id) под '
+        'блокировкой записи, которую каждая пачка держит до коммита.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл JSONL или CSV; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат ввода; по умолчанию по расширению файла.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Размер пачки bulk_create; по умолчанию его выбирает '
+                 'бэкенд базы под свои лимиты.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько записей загружать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--images-dir',
+            help='Откуда брать картинки с относительными путями; '
+                 'по умолчанию каталог входного файла.'
+        )
+        parser.add_argument(
+            '--state',
+            help='Файл с числом уже загруженных записей; по умолчанию '
+                 '<path>.state рядом с входным файлом.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на файл состояния.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        self.batch_size = options['batch_size']
+        self.images_dir = options['images_dir'] or os.path.dirname(
+            os.path.abspath(path)
+        )
+        self.state_path = options['state'] or (
+            None if path == '-' else f'{path}.state'
+        )
+        # имя → id; растут с числом разных авторов и групп, а не постов
+        self.authors = {}
+        self.groups = {}
+        self.touched_authors = set()
+        done = 0 if options['restart'] else self.load_state()
+        totals = Counter()
+        started = time.monotonic()
+        with self.open(path) as file:
+            records = islice(enumerate(self.read(file, fmt), 1), done, None)
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                totals.update(self.import_chunk(chunk, done))
+                done = chunk[-1][0]
+                self.save_state(done)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Записей: {done}, постов: {totals["posts"]}, '
+                    f'комментариев: {totals["comments"]}, '
+                    f'{totals["posts"] / elapsed:.0f} постов/с'
+                )
+        self.rebuild_timelines()
+        # ленты собраны: повторный запуск не будет пересобирать их снова
+        self.touched_authors.clear()
+        self.save_state(done)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {totals["posts"]}, комментариев: '
+            f'{totals["comments"]}, картинок: {totals["images"]}, '
+            f'пропущено записей: {totals["skipped"]} за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
+
+    def open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+
+    def read(self, file, fmt):
+        """Записи ввода по одной: JSON-объект или строка CSV."""
+        if fmt == 'csv':
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield line
+
+    def load_state(self):
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return 0
+        with open(self.state_path) as file:
+            state = json.load(file)
+        done = state['done']
+        # авторы пачек, загруженных до падения: их подписчикам ленты
+        # пересоберёт этот запуск
+        self.touched_authors.update(state.get('authors', ()))
+        pending = state.get('pending')
+        # упали между коммитом пачки и записью состояния: пачка уже в базе
+        if pending and Post.objects.filter(id=pending['post']).exists():
+            done = pending['done']
+        self.stdout.write(f'Продолжаем после записи {done}')
+        return done
+
+    def save_state(self, done, pending=None):
+        if self.state_path is None:
+            return
+        state = {'done': done, 'authors': sorted(self.touched_authors)}
+        if pending:
+            state['pending'] = pending
+        temporary = f'{self.state_path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporary, self.state_path)
+
+    def parse(self, raw):
+        """Проверенная запись поста из строки JSONL или CSV."""
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        if not isinstance(raw, dict):
+            raise ValueError('запись должна быть объектом')
+        comments = raw.get('comments') or []
+        if isinstance(comments, str):
+            comments = json.loads(comments)
+        if not raw.get('author') or not raw.get('text'):
+            raise ValueError('нужны author и text')
+        return {
+            'author': raw['author'],
+            'group': raw.get('group') or None,
+            'group_title': raw.get('group_title') or None,
+            'text': raw['text'],
+            'pub_date': parse_date(raw.get('pub_date')),
+            'image': raw.get('image') or '',
+            'comments': [
+                {
+                    'author': comment['author'],
+                    'text': comment['text'],
+                    'created': parse_date(comment.get('created')),
+                }
+                for comment in comments
+            ],
+        }
+
+    def import_chunk(self, chunk, done):
+        totals = Counter()
+        entries = []
+        for number, raw in chunk:
+            try:
+                entries.append(self.parse(raw))
+            except (ValueError, KeyError, TypeError) as error:
+                self.stderr.write(f'Запись {number} пропущена: {error}')
+                totals['skipped'] += 1
+        for entry in entries:
+            if entry['image']:
+                entry['image'] = self.copy_image(entry['image'])
+                totals['images'] += bool(entry['image'])
+        with transaction.atomic():
+            # первым запросом: сайт может писать в те же таблицы
+            lock_for_write(Post)
+            posts, comments = self.insert(entries)
+            if posts:
+                self.save_state(done, {
+                    'done': chunk[-1][0], 'post': posts[0].id
+                })
+        totals['posts'] += len(posts)
+        totals['comments'] += len(comments)
+        generations.bump(generations.GLOBAL)
+        for group_id in {post.group_id for post in posts} - {None}:
+            generations.bump(generations.GROUP, group_id)
+        for author_id in {post.author_id for post in posts}:
+            generations.bump(generations.AUTHOR, author_id)
+        return totals
+
+    def insert(self, entries):
+        self.resolve_authors({entry['author'] for entry in entries} | {
+            comment['author']
+            for entry in entries for comment in entry['comments']
+        })
+        self.resolve_groups(entries)
+        first_post = next_id(Post)
+        posts = [
+            Post(
+                id=first_post + i,
+                author_id=self.authors[entry['author']],
+                group_id=self.groups.get(entry['group']),
+                text=entry['text'],
+                image=entry['image'],
+                comments_count=len(entry['comments']),
+            )
+            for i, entry in enumerate(entries)
+        ]
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        first_comment = next_id(Comment)
+        comments = []
+        for post, entry in zip(posts, entries):
+            for comment in entry['comments']:
+                comments.append(Comment(
+                    id=first_comment + len(comments),
+                    post_id=post.id,
+                    author_id=self.authors[comment['author']],
+                    text=comment['text'],
+                ))
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        # auto_now_add проставил «сейчас»; возвращаем даты из ввода
+        dated = []
+        for post, entry in zip(posts, entries):
+            if entry['pub_date']:
+                post.pub_date = entry['pub_date']
+                dated.append(post)
+        Post.objects.bulk_update(
+            dated, ['pub_date'], batch_size=self.batch_size
+        )
+        dated = []
+        sources = (
+            source for entry in entries for source in entry['comments']
+        )
+        for comment, source in zip(comments, sources):
+            if source['created']:
+                comment.created = source['created']
+                dated.append(comment)
+        Comment.objects.bulk_update(
+            dated, ['created'], batch_size=self.batch_size
+        )
+        for author_id, total in Counter(
+            post.author_id for post in posts
+        ).items():
+            counters.bump(author_id, posts_count=total)
+            self.touched_authors.add(author_id)
+        search.index_posts(posts)
+        return posts, comments
+
+    def resolve_authors(self, usernames):
+        """Дополняет карту авторов; недостающих пользователей создаёт."""
+        missing = usernames - set(self.authors)
+        if not missing:
+            return
+        self.authors.update(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'id')
+        )
+        missing -= set(self.authors)
+        if not missing:
+            return
+        first_id = next_id(User)
+        password = make_password(None)
+        users = [
+            User(id=first_id + i, username=username, password=password)
+            for i, username in enumerate(sorted(missing))
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        Profile.objects.bulk_create(
+            [Profile(user_id=user.id) for user in users],
+            batch_size=self.batch_size,
+        )
+        self.authors.update((user.username, user.id) for user in users)
+
+    def resolve_groups(self, entries):
+        titles = {
+            entry['group']: entry['group_title'] or entry['group']
+            for entry in entries
+            if entry['group'] and entry['group'] not in self.groups
+        }
+        if not titles:
+            return
+        self.groups.update(
+            Group.objects.filter(slug__in=titles).values_list('slug', 'id')
+        )
+        missing = sorted(set(titles) - set(self.groups))
+        if not missing:
+            return
+        first_id = next_id(Group)
+        groups = [
+            Group(id=first_id + i, slug=slug, title=titles[slug][:200],
+                  description='')
+            for i, slug in enumerate(missing)
+        ]
+        Group.objects.bulk_create(groups, batch_size=self.batch_size)
+        self.groups.update((group.slug, group.id) for group in groups)
+
+    def copy_image(self, source):
+        """Копирует картинку в MEDIA_ROOT, возвращает её имя в хранилище.
+
+        Имя зависит только от исходного пути, так что после падения
+        повторная загрузка не плодит копий.
+        """
+        path = os.path.join(self.images_dir, source)
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        name = f'posts/import/{digest[:16]}/{os.path.basename(path)}'
+        if default_storage.exists(name):
+            return name
+        try:
+            with open(path, 'rb') as file:
+                return default_storage.save(name, File(file))
+        except OSError as error:
+            self.stderr.write(f'Картинка {source} пропущена: {error}')
+            return ''
+
+    def rebuild_timelines(self):
+        """Пересобирает ленты подписчиков авторов с новыми постами.
+
+        Загруженные посты старые: раскладывать их по лентам по одному
+        дороже, чем собрать ленты заново.
+        """
+        authors = list(self.touched_authors)
+        for start in range(0, len(authors), 500):
+            users = list(
+                Follow.objects.filter(author__in=authors[start:start + 500])
+                .values_list('user', flat=True).distinct()
+            )
+            for first in range(0, len(users), 500):
+                timeline.rebuild_many(users[first:first + 500])
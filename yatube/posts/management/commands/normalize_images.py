@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import images, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает и перекодирует картинки постов, загруженные до '
+        'нормализации, и создаёт им миниатюры.'
+    )
+
+    def handle(self, *args, **options):
+        # имена читаем заранее: normalize переписывает те же строки
+        names = list(
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        )
+        changed = 0
+        for name in names:
+            new_name = images.normalize(name)
+            if new_name != name:
+                thumbnails.generate(new_name)
+                changed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Перекодировано картинок: {changed} из {len(names)}'
+        ))
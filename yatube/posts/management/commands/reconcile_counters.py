@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters, generations
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с реальными данными.'
+
+    def handle(self, *args, **options):
+        profiles = counters.reconcile_profiles()
+        posts = counters.reconcile_comments()
+        if posts:
+            generations.bump(generations.COMMENTS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено профилей: {profiles}, постов: {posts}'
+        ))
@@ -0,0 +1,184 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts import counters, generations, search, timeline
+from posts.bulk import lock_for_write, next_id
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Пароль всех созданных пользователей, чтобы под ними можно было войти
+PASSWORD = 'seed-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument(
+            '--skew', type=float, default=1.16,
+            help='Параметр α распределения Парето для популярности авторов: '
+                 'чем меньше, тем сильнее перекос (1.16 — правило 80/20).'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней раскидать даты постов.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Размер пачки bulk_create; по умолчанию его выбирает '
+                 'бэкенд базы под свои лимиты.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.days = options['days']
+        with transaction.atomic():
+            lock_for_write(Post)
+            users = self.create_users(options['users'])
+            groups = self.create_groups(options['groups'])
+            # популярность автора одна и та же для постов и подписчиков:
+            # кого много читают, тот и пишет больше
+            weights = [
+                self.random.paretovariate(options['skew']) for _ in users
+            ]
+            posts = self.create_posts(
+                options['posts'], users, weights, groups
+            )
+            self.create_comments(options['comments'], users, posts)
+            follows = self.create_follows(options['follows'], users, weights)
+            self.stdout.write('Пересчёт счётчиков, лент и индекса…')
+            counters.reconcile_profiles()
+            counters.reconcile_comments()
+            timeline.rebuild_many(list(follows))
+            search.rebuild()
+        # новые посты видны на главной; страницы новых групп и авторов
+        # в кеше ещё не бывали
+        generations.bump(generations.GLOBAL)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, групп: {len(groups)}, '
+            f'постов: {len(posts)}, комментариев: {options["comments"]}, '
+            f'подписок: {sum(len(a) for a in follows.values())}. '
+            f'Пароль пользователей: {PASSWORD}'
+        ))
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        first_id = next_id(User)
+        users = [
+            User(
+                id=first_id + i,
+                username=f'{self.fake.user_name()}{first_id + i}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=self.fake.email(),
+                password=password,
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        return [user.id for user in users]
+
+    def create_groups(self, count):
+        first_id = next_id(Group)
+        groups = [
+            Group(
+                id=first_id + i,
+                title=self.fake.catch_phrase()[:200],
+                slug=f'group-{first_id + i}',
+                description=self.fake.paragraph(),
+            )
+            for i in range(count)
+        ]
+        Group.objects.bulk_create(groups, batch_size=self.batch_size)
+        return [group.id for group in groups]
+
+    def random_date(self, now):
+        return now - timedelta(seconds=self.random.uniform(
+            0, self.days * 24 * 60 * 60
+        ))
+
+    def create_posts(self, count, users, weights, groups):
+        now = timezone.now()
+        first_id = next_id(Post)
+        authors = self.random.choices(users, weights, k=count)
+        posts = [
+            Post(
+                id=first_id + i,
+                author_id=author_id,
+                group_id=(
+                    self.random.choice(groups)
+                    if groups and self.random.random() < 0.7 else None
+                ),
+                text=self.fake.text(max_nb_chars=600),
+            )
+            for i, author_id in enumerate(authors)
+        ]
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        # auto_now_add проставил всем «сейчас», разносим даты по времени
+        for post in posts:
+            post.pub_date = self.random_date(now)
+        Post.objects.bulk_update(
+            posts, ['pub_date'], batch_size=self.batch_size
+        )
+        return [(post.id, post.pub_date) for post in posts]
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        chunk = self.batch_size or 1000
+        for start in range(0, count, chunk):
+            size = min(chunk, count - start)
+            comments = [
+                Comment(
+                    post_id=self.random.choice(posts)[0],
+                    author_id=self.random.choice(users),
+                    text=self.fake.sentence(),
+                )
+                for _ in range(size)
+            ]
+            Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+
+    def create_follows(self, count, users, weights):
+        """Подписки с перекосом: авторы выбираются по весам Парето.
+
+        Возвращает словарь «подписчик → множество авторов».
+        """
+        follows = {}
+        pairs = set()
+        limit = len(users) * (len(users) - 1)
+        attempts = 0
+        while len(pairs) < min(count, limit) and attempts < count * 10:
+            attempts += 1
+            user_id = self.random.choice(users)
+            author_id, = self.random.choices(users, weights)
+            if user_id == author_id or (user_id, author_id) in pairs:
+                continue
+            pairs.add((user_id, author_id))
+            follows.setdefault(user_id, set()).add(author_id)
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in pairs],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return follows
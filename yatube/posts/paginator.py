@@ -0,0 +1,171 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса ``django.core.paginator.Page``,
+    которой пользуются шаблоны, но не знает ни номера страницы,
+    ни общего числа объектов.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.previous_cursor}..{self.next_cursor}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по упорядоченному набору полей.
+
+    Вместо ``COUNT(*)`` и ``OFFSET`` каждая страница выбирается условием
+    «строго после/до граничной записи» по ключу ``ordering``, поэтому
+    любая страница стоит столько же, сколько первая. Все поля ключа
+    должны сортироваться в одну сторону, последнее поле — уникальное.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        if any(name.startswith('-') != self.descending
+               for name in self.ordering):
+            raise ValueError('Все поля ordering должны сортироваться '
+                             'в одном направлении.')
+
+    def encode_cursor(self, direction, item):
+        payload = [direction] + [
+            self._get_value(item, name) for name in self.fields
+        ]
+        raw = json.dumps(payload, default=self._serialize).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            direction, *values = json.loads(raw.decode())
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            model = self.queryset.model
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception as error:
+            raise InvalidCursor(cursor) from error
+        return direction, values
+
+    def page(self, cursor=None):
+        """Возвращает страницу по курсору, ``None`` — первая страница."""
+        if not cursor:
+            items = self._fetch(self.ordering, None, forward=True)
+            return self._build_page(items, has_more=False, forward=True)
+        direction, values = self.decode_cursor(cursor)
+        forward = direction == 'n'
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = tuple(self._reverse(name) for name in self.ordering)
+        items = self._fetch(ordering, values, forward)
+        return self._build_page(items, has_more=True, forward=forward)
+
+    def get_page(self, cursor=None):
+        """Как ``page()``, но битый курсор ведёт на первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _fetch(self, ordering, values, forward):
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._boundary(values, forward))
+        return list(queryset[:self.per_page + 1])
+
+    def _build_page(self, items, has_more, forward):
+        """Собирает страницу из выборки на одну запись длиннее страницы.
+
+        Лишняя запись говорит о том, что в направлении выборки есть ещё
+        страница; в обратную сторону страница есть всегда, если пришли
+        по курсору (``has_more``).
+        """
+        overflow = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not forward:
+            items.reverse()
+        has_next = overflow if forward else has_more
+        has_previous = has_more if forward else overflow
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.encode_cursor('n', items[-1])
+        if items and has_previous:
+            previous_cursor = self.encode_cursor('p', items[0])
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+    def _boundary(self, values, forward):
+        """Условие «после граничной записи» для составного ключа.
+
+        Для ключа (pub_date, id) это ``pub_date <= x AND (pub_date < x
+        OR (pub_date = x AND id < y))``. Первое слагаемое повторяет
+        дизъюнкцию, но только по нему SQLite видит диапазон по первому
+        полю ключа и сканирует индекс от границы, а не фильтрует
+        построчно и не сортирует выборку заново.
+        """
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for index, name in enumerate(self.fields):
+            equal = dict(zip(self.fields[:index], values[:index]))
+            equal[f'{name}__{lookup}'] = values[index]
+            condition |= Q(**equal)
+        if len(self.fields) == 1:
+            return condition
+        return Q(**{f'{self.fields[0]}__{lookup}e': values[0]}) & condition
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @staticmethod
+    def _serialize(value):
+        # DjangoJSONEncoder обрезает микросекунды, а ключу нужна точность
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        raise TypeError(f'{type(value).__name__} нельзя положить в курсор')
+
+    @staticmethod
+    def _get_value(item, name):
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
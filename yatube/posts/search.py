@@ -0,0 +1,102 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый индекс постов: таблица FTS5 с rowid = id поста.
+# Таблица хранит свою копию текста, поэтому её не ломают пересборки
+# posts_post, которые Django делает в миграциях на SQLite.
+FTS_TABLE = 'posts_post_fts'
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def to_match(query):
+    """Превращает ввод пользователя в безопасный запрос MATCH.
+
+    Каждое слово — префиксный поиск, все слова обязательны.
+    """
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index_post(post):
+    index_posts([post])
+
+
+def index_posts(posts):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, text) '
+            'VALUES (%s, %s)',
+            [(post.pk, post.text) for post in posts],
+        )
+
+
+def unindex_post(post_id):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+
+def rebuild():
+    """Пересобирает индекс по таблице постов, возвращает число постов."""
+    if not is_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+        count = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return count
+
+
+def _fallback(queryset, query):
+    condition = Q()
+    for word in re.findall(r'\w+', query):
+        condition &= Q(text__icontains=word)
+    return queryset.filter(condition)
+
+
+def filter_posts(queryset, query):
+    """Посты, подходящие под запрос, без сортировки по релевантности."""
+    match = to_match(query)
+    if not match:
+        return queryset.none()
+    if not is_enabled():
+        return _fallback(queryset, query)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match],
+    ))
+
+
+def search_posts(queryset, query):
+    """Посты, подходящие под запрос, от самых релевантных (BM25)."""
+    match = to_match(query)
+    if not match:
+        return queryset.none()
+    if not is_enabled():
+        return _fallback(queryset, query)
+    return queryset.extra(
+        select={'rank': f'bm25({FTS_TABLE})'},
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = posts_post.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+    ).order_by('rank', '-pub_date')
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, generations, search, timeline
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        generations.bump(generations.GROUP, instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # при смене группы надо сбросить кеш и старой группы
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump(instance.author_id, posts_count=1)
+        # пост из формы, админки или шелла одинаково попадает в ленты,
+        # но только когда он уже виден другим соединениям
+        transaction.on_commit(lambda: timeline.fan_out(instance))
+    generations.bump_post(instance, instance._loaded_group_id)
+    instance._loaded_group_id = instance.group_id
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, posts_count=-1)
+    generations.bump_post(instance, instance._loaded_group_id)
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+        generations.bump(generations.COMMENTS)
+    generations.bump(generations.POST, instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    generations.bump(generations.COMMENTS)
+    generations.bump(generations.POST, instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump(instance.author_id, followers_count=1)
+        counters.bump(instance.user_id, following_count=1)
+        bump_profiles(instance)
+        # автор только что стал популярным
+        bump_popular(instance, settings.TIMELINE_FANOUT_LIMIT + 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, followers_count=-1)
+    counters.bump(instance.user_id, following_count=-1)
+    bump_profiles(instance)
+    bump_popular(instance, settings.TIMELINE_FANOUT_LIMIT)
+
+
+def bump_profiles(follow):
+    generations.bump(generations.PROFILE, follow.author_id)
+    generations.bump(generations.PROFILE, follow.user_id)
+
+
+def bump_popular(follow, followers_count):
+    """Сдвигает POPULAR, если автор пересёк порог популярности."""
+    if Profile.objects.filter(
+        user_id=follow.author_id, followers_count=followers_count
+    ).exists():
+        generations.bump(generations.POPULAR)
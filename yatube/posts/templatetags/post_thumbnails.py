@@ -0,0 +1,24 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_thumbnail(context, image):
+    """Готовая миниатюра картинки поста или None, пока она создаётся.
+
+    Если вьюха положила в контекст ``thumbnails`` (PageThumbnails),
+    миниатюра берётся оттуда, без отдельного обращения к хранилищу.
+    """
+    if not image:
+        return None
+    prefetched = context.get('thumbnails')
+    if prefetched is not None:
+        thumbnail = prefetched.get(image)
+    else:
+        thumbnail = thumbnails.lookup(image)
+    if thumbnail is None:
+        thumbnails.schedule(image)
+    return thumbnail
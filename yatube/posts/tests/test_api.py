@@ -0,0 +1,165 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+from .. import timeline
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(13):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group
+            )
+        cls.post = Post.objects.create(author=cls.user, text='Последний')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        timeline.rebuild(cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feeds(self):
+        """Ленты отдают JSON с курсором на следующую страницу."""
+        urls = {
+            reverse('posts:api_index'): 14,
+            reverse('posts:api_group_list', kwargs={'slug': 'test-slug'}): 13,
+            reverse('posts:api_profile', kwargs={'username': 'auth'}): 14,
+            reverse('posts:api_follow_index'): 14,
+        }
+        for url, total in urls.items():
+            with self.subTest(url=url):
+                data = self.reader_client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertIsNone(data['previous'])
+                second = self.reader_client.get(data['next']).json()
+                self.assertEqual(len(second['results']), total - 10)
+                self.assertIsNone(second['next'])
+
+    def test_sparse_fields(self):
+        """fields= оставляет только запрошенные поля и лишние JOIN-ы."""
+        url = reverse('posts:api_index')
+        with CaptureQueriesContext(connection) as context:
+            data = self.guest_client.get(url, {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertFalse(any(
+            'auth_user' in query['sql'] and 'posts_post' in query['sql']
+            for query in context.captured_queries
+        ))
+        data = self.guest_client.get(url, {'fields': 'author,group'}).json()
+        self.assertEqual(
+            data['results'][0], {'author': 'auth', 'group': None}
+        )
+
+    def test_unknown_field(self):
+        """Неизвестное поле — 400 с перечнем доступных."""
+        response = self.guest_client.get(
+            reverse('posts:api_index'), {'fields': 'text,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_post_detail(self):
+        """Пост отдаётся с комментариями; чужой id — 404 в JSON."""
+        data = self.guest_client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.id}
+        )).json()
+        self.assertEqual(data['text'], 'Последний')
+        self.assertEqual(
+            [comment['author'] for comment in data['comments']], ['reader']
+        )
+        response = self.guest_client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.json())
+
+    def test_post_detail_pages_comments(self):
+        """Комментарии поста отдаются страницами по курсору."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Ответ {i}')
+            for i in range(4)
+        )
+        url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.id}
+        )
+        data = self.guest_client.get(url, {'limit': 2}).json()
+        texts = [comment['text'] for comment in data['comments']]
+        self.assertEqual(texts, ['Ок', 'Ответ 0'])
+        self.assertIsNone(data['comments_previous'])
+        while data['comments_next']:
+            data = self.guest_client.get(data['comments_next']).json()
+            self.assertLessEqual(len(data['comments']), 2)
+            self.assertEqual(data['text'], 'Последний')
+            texts += [comment['text'] for comment in data['comments']]
+        self.assertEqual(texts, ['Ок'] + [f'Ответ {i}' for i in range(4)])
+
+    def test_feed_etag_tracks_comments_count(self):
+        """Новый комментарий меняет ETag ленты с полем comments_count."""
+        url = reverse('posts:api_index')
+        for fields in ('id,comments_count', ''):
+            with self.subTest(fields=fields):
+                query = {'fields': fields} if fields else {}
+                response = self.guest_client.get(url, query)
+                etag = response['ETag']
+                Comment.objects.create(
+                    post=self.post, author=self.reader, text='Ещё'
+                )
+                response = self.guest_client.get(
+                    url, query, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.post.refresh_from_db()
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'],
+                    self.post.comments_count,
+                )
+
+    def test_feed_etag_without_comments_count(self):
+        """Без comments_count комментарий ленту не инвалидирует."""
+        url = reverse('posts:api_index')
+        query = {'fields': 'id,text'}
+        etag = self.guest_client.get(url, query)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='Ещё')
+        response = self.guest_client.get(url, query, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_follow_requires_login(self):
+        """Лента подписок гостю — 401, а не редирект."""
+        response = self.guest_client.get(reverse('posts:api_follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_no_templates(self):
+        """API не рендерит шаблоны."""
+        response = self.guest_client.get(reverse('posts:api_index'))
+        self.assertEqual(response.templates, [])
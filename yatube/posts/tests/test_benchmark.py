@@ -0,0 +1,54 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.conf import settings
+from django.core.management import call_command
+
+from ..models import Comment, Follow, Group, Post, User
+from .. import counters
+from ..urls import urlpatterns
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedAndBenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed', users=6, groups=2, posts=30, comments=20, follows=10,
+            seed=1, stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed(self):
+        """seed создаёт данные и согласованные с ними счётчики."""
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertEqual(Follow.objects.count(), 10)
+        self.assertEqual(counters.reconcile_profiles(), 0)
+        self.assertEqual(counters.reconcile_comments(), 0)
+
+    def test_benchmark_report(self):
+        """benchmark замеряет все маршруты и ничего не меняет в базе."""
+        out = StringIO()
+        call_command('benchmark', requests=2, warmup=0, stdout=out)
+        routes = json.loads(out.getvalue())['routes']
+        self.assertEqual(
+            set(routes), {pattern.name for pattern in urlpatterns}
+        )
+        for name, route in routes.items():
+            with self.subTest(name=name):
+                self.assertTrue(all(code < 400 for code in route['status']))
+                self.assertLessEqual(route['p50_ms'], route['p99_ms'])
+        self.assertEqual(Comment.objects.count(), 20)
@@ -7,7 +7,7 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
 
-from ..models import Post
+from ..models import Post, Group, Comment
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -20,13 +20,20 @@ class GroupCacheTests(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='group',
+            description='Тестовое описание',
+            slug='slug',
+        )
         cls.post = Post.objects.create(
             author=cls.user,
             text='Тестовый пост',
+            group=cls.group,
         )
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     @classmethod
     def tearDownClass(cls):
@@ -40,10 +47,61 @@ class GroupCacheTests(TestCase):
         url = reverse('posts:index')
         response = self.guest_client.get(url)
         self.assertEqual(len(response.context['page_obj']), 1)
-        post = Post.objects.get(id=1)
-        post.delete()
+        Post.objects.filter(id=self.post.id).update(text='Обновлённый')
         response = self.guest_client.get(url)
-        self. assertIn(post.text, response.content.decode())
+        self.assertIn(self.post.text, response.content.decode())
         cache.clear()
         response = self.guest_client.get(url)
-        self.assertNotIn(post.text, response.content.decode())
+        self.assertNotIn(self.post.text, response.content.decode())
+
+    def test_write_invalidates_fragments(self):
+        """Запись поста сразу сбрасывает кеш всех его страниц."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ]
+        for url in urls:
+            self.guest_client.get(url)
+        self.post.text = 'Отредактированный пост'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn(
+                    'Отредактированный пост', response.content.decode()
+                )
+        self.post.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn(
+                    'Отредактированный пост', response.content.decode()
+                )
+
+    def test_group_change_invalidates_old_group(self):
+        """Пост, перенесённый в другую группу, пропадает из старой."""
+        url = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        self.guest_client.get(url)
+        post = Post.objects.get(id=self.post.id)
+        post.group = None
+        post.save()
+        response = self.guest_client.get(url)
+        self.assertNotIn(self.post.text, response.content.decode())
+
+    def test_comment_invalidates_only_its_post(self):
+        """Комментарий сбрасывает кеш комментариев, но не ленты."""
+        index_url = reverse('posts:index')
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+        self.guest_client.get(index_url)
+        self.guest_client.get(detail_url)
+        Post.objects.filter(id=self.post.id).update(text='Обновлённый')
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        response = self.guest_client.get(detail_url)
+        self.assertIn('Новый комментарий', response.content.decode())
+        response = self.guest_client.get(index_url)
+        self.assertIn(self.post.text, response.content.decode())
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..views import COMMENTS_PER_PAGE
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+
+TOTAL = COMMENTS_PER_PAGE * 2 + 5
+
+
+class CommentPaginationTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Вирусный пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(TOTAL)
+        )
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.id}
+        )
+        cls.fragment_url = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_detail_shows_first_page(self):
+        """На странице поста только первая страница комментариев."""
+        response = self.assertQueryBudget(self.client, self.detail_url, 3)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertTrue(comments.has_next())
+        self.assertContains(
+            response, f'?cursor={comments.next_cursor}'
+        )
+
+    def test_fragment_loads_all_pages(self):
+        """Фрагменты по курсору отдают остальные комментарии по порядку."""
+        texts = []
+        cursor = None
+        while True:
+            url = self.fragment_url
+            if cursor:
+                url += f'?cursor={cursor}'
+            response = self.assertQueryBudget(self.client, url, 2)
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            page = response.context['comments']
+            texts += [comment.text for comment in page]
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(texts, [f'Комментарий {i}' for i in range(TOTAL)])
+
+    def test_detail_without_script(self):
+        """Без скрипта ссылка ведёт на страницу поста со следующими."""
+        first = self.client.get(self.detail_url).context['comments']
+        response = self.client.get(
+            self.detail_url, {'comments': first.next_cursor}
+        )
+        comments = response.context['comments']
+        self.assertEqual(comments[0].text, f'Комментарий {COMMENTS_PER_PAGE}')
+        self.assertContains(response, f'Комментарий {COMMENTS_PER_PAGE}')
+
+    def test_missing_post(self):
+        """Фрагмент несуществующего поста — 404."""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
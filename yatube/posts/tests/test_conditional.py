@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def urls(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+
+    def revalidate(self, client, url, etag):
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без шаблонов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+                response = self.revalidate(
+                    self.guest_client, url, response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.content)
+                self.assertEqual(response.templates, [])
+
+    def test_etag_depends_on_viewer_and_query(self):
+        """ETag у разных зрителей и страниц пагинатора разный."""
+        url = reverse('posts:index')
+        guest = self.guest_client.get(url)['ETag']
+        reader = self.reader_client.get(url)['ETag']
+        page = self.guest_client.get(url, {'page': 2})['ETag']
+        self.assertEqual(len({guest, reader, page}), 3)
+
+    def test_changes_reset_etag(self):
+        """Новые посты, комментарии и подписки меняют ETag страниц."""
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls()}
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.revalidate(
+                    self.guest_client, url, etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.guest_client.get(detail)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='К')
+        self.assertEqual(
+            self.revalidate(self.guest_client, detail, etag).status_code, 200
+        )
+        profile = reverse('posts:profile', kwargs={'username': 'auth'})
+        etag = self.reader_client.get(profile)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(
+            self.revalidate(self.reader_client, profile, etag).status_code,
+            200
+        )
+
+    def test_missing_objects(self):
+        """Несуществующие группа, автор и пост по-прежнему дают 404."""
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.management import call_command
+
+from ..models import Post, Comment, Follow, Profile
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Число постов автора растёт и падает вместе с постами."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        self.assertEqual(self.profile(self.user).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.profile(self.user).posts_count, 0)
+
+    def test_comment_counter(self):
+        """Число комментариев поста растёт и падает вместе с ними."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики подписчиков и подписок."""
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(self.profile(self.user).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.profile(self.user).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_delete_with_drifted_counters(self):
+        """Удаление при нулевом счётчике не падает и не уходит в минус."""
+        Post.objects.bulk_create([Post(author=self.user, text='Пост')])
+        post = Post.objects.get()
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.reader, text='Комментарий')]
+        )
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.user)]
+        )
+        Comment.objects.get().delete()
+        Follow.objects.get().delete()
+        post.delete()
+        self.assertFalse(Post.objects.exists())
+        profile = self.profile(self.user)
+        self.assertEqual(profile.posts_count, 0)
+        self.assertEqual(profile.followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_delete_user_with_drifted_counters(self):
+        """Каскадное удаление автора проходит при отставших счётчиках."""
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            [Post(author=author, text='Пост') for _ in range(2)]
+        )
+        Follow.objects.bulk_create([Follow(user=self.reader, author=author)])
+        author.delete()
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост') for _ in range(3)]
+        )
+        Profile.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertEqual(self.profile(self.user).posts_count, 3)
+        self.assertTrue(Profile.objects.filter(user=self.reader).exists())
+        self.assertIn('Исправлено профилей: 1', out.getvalue())
@@ -0,0 +1,124 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from ..models import Post, Group, Comment
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif'
+            ),
+        )
+        Post.objects.create(author=cls.user, text='Второй пост')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(post=cls.post, author=cls.other, text='Ок')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_export_requires_login(self):
+        """Гость отправляется на страницу входа."""
+        response = self.guest_client.get(reverse('posts:export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_jsonl(self):
+        """JSONL содержит только свои посты с комментариями."""
+        response = self.authorized_client.get(reverse('posts:export'))
+        self.assertTrue(response.streaming)
+        self.assertIn('auth-posts.jsonl', response['Content-Disposition'])
+        records = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [record['text'] for record in records],
+            ['Пост с картинкой', 'Второй пост'],
+        )
+        self.assertEqual(records[0]['group'], 'test-slug')
+        self.assertEqual(records[0]['comments'][0]['author'], 'other')
+        self.assertEqual(records[0]['image'], self.post.image.name)
+
+    def test_export_zip(self):
+        """ZIP собирается потоком и содержит посты и картинки."""
+        response = self.authorized_client.get(
+            reverse('posts:export'), {'format': 'zip'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(
+                archive.namelist(),
+                ['posts.jsonl', f'images/{self.post.image.name}'],
+            )
+            lines = archive.read('posts.jsonl').splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_unknown_format(self):
+        """Неизвестный формат выгрузки — 404."""
+        response = self.authorized_client.get(
+            reverse('posts:export'), {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_command_round_trip(self):
+        """Выгрузка команды загружается обратно командой import_posts."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = f'{directory}/auth.jsonl'
+        call_command('export_posts', 'auth', output=path)
+        Post.objects.filter(author=self.user).delete()
+        call_command(
+            'import_posts', path, images_dir=TEMP_MEDIA_ROOT,
+            stdout=io.StringIO()
+        )
+        post = Post.objects.get(author=self.user, text='Пост с картинкой')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comments.get().author, self.other)
+        self.assertTrue(post.image)
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, Group
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост для ленты',
+            group=cls.group,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def urls(self):
+        return [
+            reverse('posts:feed'),
+            reverse('posts:group_feed', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile_feed', kwargs={'username': 'auth'}),
+        ]
+
+    def test_atom_feeds(self):
+        """Ленты отдаются в Atom и содержат посты своей области."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(
+                        'application/atom+xml'
+                    )
+                )
+                self.assertIn('Пост для ленты', response.content.decode())
+                self.assertIn('public', response['Cache-Control'])
+
+    def test_cached_and_conditional(self):
+        """Повтор берётся из кеша, а с ETag — 304 почти без запросов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as context:
+                    response = self.guest_client.get(url)
+                self.assertLessEqual(len(context), 1)
+                with CaptureQueriesContext(connection) as context:
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(context), 1)
+
+    def test_new_post_invalidates(self):
+        """Новый пост сбрасывает ленты своей области."""
+        bodies = {url: self.guest_client.get(url).content
+                  for url in self.urls()}
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        for url in self.urls():
+            with self.subTest(url=url):
+                content = self.guest_client.get(url).content
+                self.assertNotEqual(content, bodies[url])
+                self.assertIn('Свежий пост', content.decode())
+
+    def test_missing(self):
+        """Лента несуществующей группы или автора — 404."""
+        for url in (
+            reverse('posts:group_feed', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_feed', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
@@ -0,0 +1,126 @@
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follow_graph, timeline
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[2])
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.other, author=cls.authors[1])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_following_is_sorted_and_cached(self):
+        """Подписки — отсортированный массив, второй раз без запросов."""
+        following = follow_graph.get_following(self.reader.id)
+        self.assertEqual(
+            list(following), sorted([self.authors[0].id, self.authors[2].id])
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(
+                follow_graph.is_following(self.reader.id, self.authors[2].id)
+            )
+            self.assertFalse(
+                follow_graph.is_following(self.reader.id, self.authors[1].id)
+            )
+        self.assertEqual(len(context), 0)
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Подписка и отписка сразу видны в закешированном наборе."""
+        author = self.authors[1]
+        self.assertFalse(follow_graph.is_following(self.reader.id, author.id))
+        self.client.get(
+            reverse('posts:profile_follow', args=[author.username])
+        )
+        self.assertTrue(follow_graph.is_following(self.reader.id, author.id))
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[author.username])
+        )
+        self.assertFalse(follow_graph.is_following(self.reader.id, author.id))
+
+    def test_profile_button_reflects_viewer(self):
+        """Кнопка зависит от подписки зрителя, а не от чужих подписчиков."""
+        # на author1 подписан other, но не reader
+        response = self.client.get(
+            reverse('posts:profile', args=[self.authors[1].username])
+        )
+        self.assertFalse(response.context['following'])
+        response = self.client.get(
+            reverse('posts:profile', args=[self.authors[0].username])
+        )
+        self.assertTrue(response.context['following'])
+
+    def test_follow_index_skips_follow_table(self):
+        """Лента подписок не читает таблицу подписок при тёплом кеше."""
+        follow_graph.get_following(self.reader.id)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('posts:follow_index'))
+        self.assertFalse(any(
+            'FROM "posts_follow"' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_feed_binds_only_followed_popular_authors(self):
+        """В запрос ленты попадают только популярные авторы из подписок."""
+        # у author1 два подписчика — он популярен; author0 и author2 нет
+        Follow.objects.create(user=self.authors[0], author=self.authors[1])
+        self.assertEqual(
+            list(follow_graph.get_popular()), [self.authors[1].id]
+        )
+        self.assertNotIn(
+            'posts_profile', str(timeline.get_feed(self.reader).query)
+        )
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        post = Post.objects.create(author=self.authors[1], text='Пост')
+        feed = timeline.get_feed(self.reader)
+        self.assertEqual(list(feed), [post])
+        sql, params = feed.query.sql_with_params()
+        self.assertIn(self.authors[1].id, params)
+        self.assertNotIn(self.authors[0].id, params)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_set_follows_threshold(self):
+        """Пересечение порога подписчиков обновляет кеш популярных."""
+        self.assertEqual(list(follow_graph.get_popular()), [])
+        follow = Follow.objects.create(
+            user=self.authors[0], author=self.authors[1]
+        )
+        self.assertEqual(
+            list(follow_graph.get_popular()), [self.authors[1].id]
+        )
+        follow.delete()
+        self.assertEqual(list(follow_graph.get_popular()), [])
+
+    def test_intersect(self):
+        """Пересечение отсортированных массивов."""
+        self.assertEqual(
+            list(follow_graph.intersect(
+                array('q', [1, 3, 5, 7, 9]), array('q', [2, 3, 4, 9, 10])
+            )),
+            [3, 9],
+        )
+        self.assertEqual(
+            list(follow_graph.intersect(array('q'), array('q', [1]))), []
+        )
@@ -0,0 +1,179 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import generations, images, thumbnails
+from ..forms import PostForm
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def make_jpeg(size, exif=False):
+    image = Image.new('RGB', size, 'red')
+    options = {}
+    if exif:
+        data = Image.Exif()
+        # модель камеры и поворот на 90° по часовой стрелке
+        data[0x0110] = 'Camera'
+        data[0x0112] = 6
+        options['exif'] = data.tobytes()
+    output = BytesIO()
+    image.save(output, 'JPEG', **options)
+    return output.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_DIMENSION=100,
+    POST_IMAGE_FORMAT='WEBP',
+    THUMBNAIL_WORKERS=0,
+)
+class ImageNormalizeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, content, name='photo.jpg'):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с фото',
+            image=SimpleUploadedFile(name, content, 'image/jpeg'),
+        )
+
+    def test_normalize_downscales_and_strips_exif(self):
+        """Большая картинка уменьшается, поворачивается и теряет EXIF."""
+        post = self.create_post(make_jpeg((400, 200), exif=True))
+        old_name = post.image.name
+        new_name = images.normalize(old_name)
+        self.assertTrue(new_name.endswith('.webp'))
+        self.assertFalse(default_storage.exists(old_name))
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, new_name)
+        with default_storage.open(new_name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.format, 'WEBP')
+            # поворот из EXIF применён к пикселям
+            self.assertEqual(image.size, (50, 100))
+            self.assertFalse(image.info.get('exif'))
+
+    def test_normalize_keeps_small_clean_images(self):
+        """Уже подходящая картинка не переписывается."""
+        output = BytesIO()
+        Image.new('RGB', (10, 10)).save(output, 'WEBP')
+        post = self.create_post(output.getvalue(), name='small.webp')
+        self.assertEqual(images.normalize(post.image.name), post.image.name)
+
+    @override_settings(POST_IMAGE_FORMAT='JPEG')
+    def test_normalize_flattens_transparency_for_jpeg(self):
+        """Для JPEG прозрачная картинка кладётся на белый фон."""
+        output = BytesIO()
+        Image.new('RGBA', (10, 10), (0, 0, 0, 0)).save(output, 'PNG')
+        post = self.create_post(output.getvalue(), name='clear.png')
+        new_name = images.normalize(post.image.name)
+        self.assertTrue(new_name.endswith('.jpg'))
+        with default_storage.open(new_name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.mode, 'RGB')
+            self.assertEqual(image.getpixel((5, 5)), (255, 255, 255))
+
+    def test_normalize_keeps_file_written_back(self):
+        """Старый файл остаётся, если пост снова ссылается на него."""
+        post = self.create_post(make_jpeg((300, 300)))
+        old_name = post.image.name
+        bump_post = generations.bump_post
+
+        def save_stale_form(instance, *args):
+            # форма правки, открытая до перекодирования, пишет старое имя
+            Post.objects.filter(pk=instance.pk).update(image=old_name)
+            bump_post(instance, *args)
+
+        with mock.patch.object(generations, 'bump_post', save_stale_form):
+            new_name = images.normalize(old_name)
+        self.assertNotEqual(new_name, old_name)
+        self.assertTrue(default_storage.exists(old_name))
+
+    def test_edit_without_image_keeps_normalized_name(self):
+        """Правка текста не возвращает посту имя до перекодирования."""
+        post = self.create_post(make_jpeg((10, 10)))
+        is_valid = PostForm.is_valid
+
+        def normalize_meanwhile(form):
+            valid = is_valid(form)
+            Post.objects.filter(pk=post.pk).update(image='posts/new.webp')
+            return valid
+
+        with mock.patch.object(PostForm, 'is_valid', normalize_meanwhile):
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                data={'text': 'Новый текст'},
+            )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual(post.image.name, 'posts/new.webp')
+
+    def test_upload_is_normalized_after_commit(self):
+        """Загрузка через форму нормализуется после коммита."""
+        post = self.create_post(make_jpeg((300, 300)))
+        thumbnails.submit(post.image.name, normalize=True)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertIsNotNone(thumbnails.lookup(post.image))
+
+    @override_settings(POST_IMAGE_MAX_SIZE=1024)
+    def test_form_rejects_large_file(self):
+        """Форма не принимает файл больше POST_IMAGE_MAX_SIZE."""
+        content = make_jpeg((600, 600))
+        self.assertGreater(len(content), 1024)
+        form = PostForm(
+            data={'text': 'Текст'},
+            files={'image': SimpleUploadedFile('big.jpg', content)},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_create_rejects_large_resolution(self):
+        """Картинку с огромным разрешением не сохраняют."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Текст',
+                'image': SimpleUploadedFile('wide.jpg', make_jpeg((20, 20))),
+            },
+        )
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большое разрешение картинки.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_normalize_images_command(self):
+        """Команда перекодирует уже загруженные картинки."""
+        post = self.create_post(make_jpeg((300, 300)))
+        call_command('normalize_images', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
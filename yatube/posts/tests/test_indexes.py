@@ -0,0 +1,143 @@
+import re
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+from .. import timeline
+from ..views import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+# Полный просмотр таблицы без индекса: «SCAN posts_post» без «USING»
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+# Досортировка по id строк с одинаковой датой: идёт группами по ходу
+# скана индекса и с LIMIT останавливается вместе с ним
+TIE_SORT = 'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY'
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц идут по индексам, а не перебором с сортировкой."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            description='Тестовое описание',
+            slug='slug',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Post.objects.bulk_create(
+            [Post(author=cls.author, text=f'Пост {i}', group=cls.group)
+             for i in range(15)]
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.bulk_create(
+            [Comment(post=cls.post, author=cls.user, text='Комментарий')
+             for _ in range(COMMENTS_PER_PAGE + 5)]
+        )
+        timeline.rebuild(cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def plans(self, client, url):
+        """Планы всех SELECT к таблицам постов, которые сделала страница."""
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def assertUsesIndexes(self, client, url, allow_sort=False):
+        plans = self.plans(client, url)
+        self.assertTrue(plans, url)
+        for sql, plan in plans.items():
+            for step in plan:
+                if not allow_sort and step != TIE_SORT:
+                    self.assertNotIn('TEMP B-TREE', step, f'{sql}\n{plan}')
+                match = FULL_SCAN.match(step)
+                self.assertFalse(
+                    match and match.group(1).startswith('posts_'),
+                    f'{sql}\n{plan}'
+                )
+
+    def test_pages_use_indexes(self):
+        """Ленты, пост и подписки читаются по индексам."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertUsesIndexes(self.authorized_client, url)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_pages_use_indexes(self):
+        """Вторые страницы по курсору сканируют индекс от границы."""
+        feeds = [
+            (reverse('posts:index'), 'page_obj', 'cursor', False),
+            (reverse('posts:group_list', kwargs={'slug': 'slug'}),
+             'page_obj', 'cursor', False),
+            (reverse('posts:profile', kwargs={'username': 'author'}),
+             'page_obj', 'cursor', False),
+            (reverse('posts:follow_index'), 'page_obj', 'cursor', True),
+            (reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+             'comments', 'comments', False),
+            (reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+             'comments', 'cursor', False),
+        ]
+        for url, name, param, allow_sort in feeds:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                cursor = response.context[name].next_cursor
+                self.assertTrue(cursor)
+                self.assertUsesIndexes(
+                    self.authorized_client, f'{url}?{param}={cursor}',
+                    allow_sort=allow_sort,
+                )
+
+    def test_follow_feed_uses_indexes(self):
+        """Лента подписок собирается из двух поисков по индексам.
+
+        Сортируется только она сама (не больше TIMELINE_SIZE постов
+        и посты популярных авторов), а не вся таблица постов.
+        """
+        self.assertUsesIndexes(
+            self.authorized_client,
+            reverse('posts:follow_index'),
+            allow_sort=True,
+        )
+
+    def test_follow_lookup_uses_unique_index(self):
+        """Отписка ищет подписку по уникальному индексу (user, author)."""
+        plans = self.plans(
+            self.authorized_client,
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        follow_plans = [
+            plan for sql, plan in plans.items()
+            if 'FROM "posts_follow"' in sql
+        ]
+        self.assertTrue(follow_plans)
+        for plan in follow_plans:
+            self.assertTrue(
+                any('USING' in step for step in plan), plan
+            )
@@ -5,6 +5,8 @@ from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from ..models import Post, Group
 
@@ -71,3 +73,87 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(cnt=cnt):
                 response = self.client.get(url)
                 self.assertEqual(len(response.context['page_obj']), cnt)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_CURSOR_PAGINATION=True)
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='grouppag',
+            description='Тестовое описание',
+            slug='slugpag',
+        )
+        Post.objects.bulk_create(
+            [Post(
+                author=cls.user,
+                text=f'Тестовый пост {i}',
+                group=cls.group,) for i in range(0, 18)]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_cursor_pages(self):
+        """Курсоры ведут вперёд и назад без пропусков и повторов."""
+        urls = ['/', '/group/slugpag/', '/profile/author/']
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(len(first), 10)
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    url, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second), 8)
+                self.assertFalse(second.has_next())
+                ids = [post.id for post in list(first) + list(second)]
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.order_by(
+                        '-pub_date', '-id').values_list('id', flat=True))
+                )
+                back = self.client.get(
+                    url, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.id for post in back],
+                    [post.id for post in first]
+                )
+
+    def test_cursor_page_has_no_count_query(self):
+        """Страница по курсору не считает общее число постов."""
+        first = self.client.get('/').context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/', {'cursor': first.next_cursor})
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_cursor_bounds_leading_field(self):
+        """Курсор ограничивает дату диапазоном, который виден индексу."""
+        first = self.client.get('/').context['page_obj']
+        second = self.client.get(
+            '/', {'cursor': first.next_cursor}
+        ).context['page_obj']
+        for cursor, bound in ((first.next_cursor, '<='),
+                              (second.previous_cursor, '>=')):
+            with self.subTest(bound=bound):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get('/', {'cursor': cursor})
+                self.assertTrue(any(
+                    f'"posts_post"."pub_date" {bound} ' in query['sql']
+                    for query in queries
+                ))
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор отдаёт первую страницу."""
+        response = self.client.get('/', {'cursor': 'broken'})
+        self.assertEqual(len(response.context['page_obj']), 10)
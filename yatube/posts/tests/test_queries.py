@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+from .utils import QueryBudgetMixin
+from .. import timeline
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+# Бюджет запросов авторизованного пользователя на страницу;
+# два из них — сессия и пользователь
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 4,
+    'posts:post_create': 3,
+    'posts:post_edit': 4,
+    'posts:follow_index': 4,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group',
+            description='Тестовое описание',
+            slug='slug',
+        )
+        authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(10)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(
+                author=author,
+                text='Тестовый пост',
+                group=cls.group,
+            )
+        timeline.rebuild(cls.user)
+        cls.post = Post.objects.create(author=cls.user, text='Пост читателя')
+        Comment.objects.bulk_create(
+            [Comment(post=cls.post, author=author, text='Комментарий')
+             for author in authors]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_pages_fit_query_budget(self):
+        """Страницы постов укладываются в свой бюджет запросов."""
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': 'slug'}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': 'author0'}),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}),
+            'posts:post_create': reverse('posts:post_create'),
+            'posts:post_edit': reverse(
+                'posts:post_edit', kwargs={'post_id': self.post.id}),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+        for view_name, url in urls.items():
+            with self.subTest(view_name=view_name):
+                self.assertQueryBudget(
+                    self.authorized_client, url, QUERY_BUDGETS[view_name]
+                )
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.kitten = Post.objects.create(
+            author=cls.user, text='Котёнок спит на котёнке, котёнок рад'
+        )
+        cls.dog = Post.objects.create(
+            author=cls.user, text='Собака и котёнок гуляют'
+        )
+        cls.other = Post.objects.create(author=cls.user, text='Про погоду')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def found(self, query):
+        return list(search.search_posts(Post.objects.all(), query))
+
+    def test_ranking(self):
+        """Более релевантный пост идёт первым, лишние не попадают."""
+        self.assertEqual(self.found('котёнок'), [self.kitten, self.dog])
+
+    def test_prefix_and_all_words(self):
+        """Слова ищутся по префиксу и все обязательны."""
+        self.assertEqual(self.found('соба котён'), [self.dog])
+        self.assertEqual(self.found('"*)'), [])
+
+    def test_index_follows_posts(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Про котёнка в дождь'
+        post.save()
+        self.assertEqual(self.found('дождь'), [post])
+        self.assertEqual(self.found('погоду'), [])
+        Post.objects.get(pk=self.dog.pk).delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_rebuild_command(self):
+        """Команда пересобирает индекс по таблице постов."""
+        search.unindex_post(self.kitten.pk)
+        self.assertEqual(self.found('спит'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertEqual(self.found('спит'), [self.kitten])
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'собака'}
+        )
+        self.assertEqual(response.context['query'], 'собака')
+        self.assertEqual(list(response.context['page_obj']), [self.dog])
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from .. import thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif',
+            ),
+        )
+        cls.more_posts = [
+            Post.objects.create(
+                author=cls.user,
+                text='Ещё пост с картинкой',
+                image=SimpleUploadedFile(
+                    name=f'small{i}.gif',
+                    content=small_gif,
+                    content_type='image/gif',
+                ),
+            ) for i in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, страница показывает заглушку."""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        self.assertNotIn('<img class="card-img', response.content.decode())
+        thumbnail = thumbnails.generate(self.post.image.name)
+        response = self.guest_client.get(url)
+        self.assertIn(thumbnail.url, response.content.decode())
+
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails создаёт недостающие миниатюры."""
+        self.assertIsNone(thumbnails.lookup(self.post.image))
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIsNotNone(thumbnails.lookup(self.post.image))
+        self.assertIn('Создано миниатюр: 4', out.getvalue())
+
+    def test_page_thumbnails_are_batched(self):
+        """Миниатюры страницы читаются одним запросом к хранилищу."""
+        expected = [
+            thumbnails.generate(post.image.name).url
+            for post in [self.post] + self.more_posts
+        ]
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('posts:index'))
+        kvstore_queries = [
+            query for query in queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+        for url in expected:
+            self.assertIn(url, response.content.decode())
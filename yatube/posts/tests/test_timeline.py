@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+
+from django.test import Client, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from ..models import Post, Follow, TimelineEntry
+from .. import timeline
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TimelineTests(TransactionTestCase):
+    """Раскладка по лентам идёт после коммита, поэтому без TestCase."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Старый пост автора',
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        cache.clear()
+
+    def follow(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка её очищает."""
+        self.follow()
+        self.assertEqual(self.feed(), [self.post.text])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика."""
+        self.follow()
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост автора'},
+        )
+        self.assertEqual(
+            self.feed(),
+            ['Новый пост автора', self.post.text]
+        )
+
+    def test_post_saved_outside_view_fans_out(self):
+        """Пост, созданный не через форму, тоже попадает в ленту."""
+        self.follow()
+        Post.objects.create(author=self.author, text='Пост из админки')
+        self.assertEqual(
+            self.feed(),
+            ['Пост из админки', self.post.text]
+        )
+
+    def test_rolled_back_post_does_not_fan_out(self):
+        """Пост из откаченной транзакции в ленты не попадает."""
+        self.follow()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Post.objects.create(author=self.author, text='Черновик')
+                raise RuntimeError
+        self.assertEqual(self.feed(), [self.post.text])
+
+    @override_settings(TIMELINE_SIZE=2)
+    def test_timeline_is_capped(self):
+        """В ленте хранится не больше TIMELINE_SIZE постов."""
+        self.follow()
+        for text in ('Первый', 'Второй', 'Третий'):
+            self.author_client.post(
+                reverse('posts:post_create'),
+                data={'text': text},
+            )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.feed(), ['Третий', 'Второй'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_directly(self):
+        """Посты популярного автора читаются запросом, а не из ленты."""
+        self.follow()
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост популярного автора'},
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            self.feed(),
+            ['Пост популярного автора', self.post.text]
+        )
+
+    def test_rebuild(self):
+        """Пересборка восстанавливает ленту по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        timeline.rebuild(self.reader)
+        self.assertEqual(self.feed(), [self.post.text])
+
+    def test_rebuild_many(self):
+        """Пакетная пересборка даёт те же ленты, что и поштучная."""
+        self.follow()
+        for text in ('Первый', 'Второй', 'Третий'):
+            self.author_client.post(
+                reverse('posts:post_create'),
+                data={'text': text},
+            )
+        expected = set(self.reader.timeline.values_list('post', 'pub_date'))
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild_many([self.reader.id])
+        self.assertEqual(
+            set(self.reader.timeline.values_list('post', 'pub_date')),
+            expected,
+        )
@@ -0,0 +1,23 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка числа SQL-запросов, которые тратит страница."""
+
+    def assertQueryBudget(self, client, url, budget):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK, url)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+        self.assertLessEqual(
+            len(context),
+            budget,
+            f'{url}: {len(context)} запросов при бюджете {budget}:\n'
+            f'{queries}'
+        )
+        return response
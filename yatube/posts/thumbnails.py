@@ -0,0 +1,178 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import generations, images
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Единственная миниатюра, которую показывают шаблоны постов
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def thumbnail_file(image):
+    """Файл миниатюры, который sorl создал бы для картинки.
+
+    Повторяет подготовку опций из ``ThumbnailBackend.get_thumbnail``,
+    но ничего не читает и не пишет.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, GEOMETRY, options)
+    return ImageFile(name, default.storage)
+
+
+def lookup(image):
+    """Готовая миниатюра из хранилища sorl или ``None``."""
+    return default.kvstore.get(thumbnail_file(image))
+
+
+def lookup_many(images):
+    """Готовые миниатюры сразу для многих картинок.
+
+    Возвращает словарь «имя картинки → миниатюра или None». Для
+    хранилища cached_db это один ``get_many`` в кеш и не больше одного
+    запроса в базу за промахами вместо пары обращений на картинку.
+    """
+    names = {image.name if hasattr(image, 'name') else image
+             for image in images if image}
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        return {name: lookup(name) for name in names}
+    keys = {
+        add_prefix(thumbnail_file(name).key): name for name in names
+    }
+    values = kvstore.cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        for key in missing:
+            values[key] = found.get(key, EMPTY_VALUE)
+        kvstore.cache.set_many(
+            {key: values[key] for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+    return {
+        name: deserialize_image_file(values[key])
+        if values[key] and values[key] != EMPTY_VALUE else None
+        for key, name in keys.items()
+    }
+
+
+class PageThumbnails:
+    """Миниатюры страницы постов, которые читаются при первом обращении.
+
+    Если лента пришла из кеша фрагментов, обращения не будет вовсе.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self._thumbnails = None
+
+    def get(self, image):
+        if self._thumbnails is None:
+            self._thumbnails = lookup_many(post.image for post in self.posts)
+        if image.name in self._thumbnails:
+            return self._thumbnails[image.name]
+        return lookup(image)
+
+
+def generate(name):
+    """Создаёт миниатюру картинки ``name`` (путь внутри MEDIA_ROOT).
+
+    Закешированные страницы с заглушкой вместо неё сбрасываются.
+    """
+    try:
+        thumbnail = get_thumbnail(name, GEOMETRY, **OPTIONS)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+        return None
+    posts = Post.objects.filter(image=name).only('author', 'group')
+    for post in posts:
+        generations.bump_post(post)
+    return thumbnail
+
+
+def process(name, normalize=False):
+    """Нормализует картинку, если нужно, и создаёт ей миниатюру."""
+    if normalize:
+        try:
+            name = images.normalize(name)
+        except Exception:
+            logger.exception('Не удалось обработать картинку %s', name)
+    generate(name)
+
+
+def _run(name, normalize):
+    try:
+        process(name, normalize)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        # поток пула живёт долго, а соединение с базой ему нужно на
+        # одну задачу
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def submit(name, normalize=False):
+    """Ставит картинку в очередь пула, если она ещё не в очереди."""
+    if settings.THUMBNAIL_WORKERS <= 0:
+        process(name, normalize)
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    _get_executor().submit(_run, name, normalize)
+
+
+def schedule(image, normalize=False):
+    """Создаёт миниатюру в фоне после коммита текущей транзакции.
+
+    С ``normalize`` картинка перед этим уменьшается и перекодируется
+    (см. ``images.normalize``) — так обрабатываются новые загрузки.
+    """
+    if image:
+        name = image.name
+        transaction.on_commit(lambda: submit(name, normalize))
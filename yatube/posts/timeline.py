@@ -0,0 +1,147 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import OuterRef, Q, Subquery
+
+from . import follow_graph
+from .models import Follow, Post, Profile, TimelineEntry
+
+
+def popular_authors():
+    """Авторы, чьи посты не раскладываются по лентам подписчиков."""
+    return Profile.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values('user')
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)[:limit + 1]
+    )
+    if len(followers) > limit:
+        return
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers],
+        ignore_conflicts=True,
+    )
+    trim(followers)
+
+
+def backfill(user, author):
+    """Добавляет в ленту свежие посты автора, на которого подписались."""
+    if Profile.objects.filter(
+        user=author,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists():
+        return
+    _fill(user.id, author.id)
+    trim([user.id])
+
+
+def prune(user, author):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def trim(user_ids):
+    """Оставляет в лентах не больше TIMELINE_SIZE последних постов.
+
+    Одним запросом на всех пользователей: граница для каждой ленты
+    берётся коррелированным подзапросом по индексу (user, -pub_date).
+    """
+    size = settings.TIMELINE_SIZE
+    boundary = (
+        TimelineEntry.objects.filter(user=OuterRef('user'))
+        .order_by('-pub_date')
+        .values('pub_date')[size - 1:size]
+    )
+    TimelineEntry.objects.filter(
+        user__in=user_ids,
+        pub_date__lt=Subquery(boundary),
+    ).delete()
+
+
+def get_feed(user):
+    """Лента подписок: посты из таблицы ленты и популярных авторов."""
+    timeline = TimelineEntry.objects.filter(user=user).values('post')
+    # подписки и популярные авторы берутся из кеша и пересекаются в
+    # памяти: в запрос попадают только популярные авторы из подписок
+    popular = follow_graph.intersect(
+        follow_graph.get_following(user.id), follow_graph.get_popular()
+    )
+    if not popular:
+        return Post.objects.filter(pk__in=timeline)
+    return Post.objects.filter(
+        Q(pk__in=timeline) | Q(author_id__in=list(popular))
+    )
+
+
+def rebuild(user):
+    """Пересобирает ленту пользователя с нуля."""
+    TimelineEntry.objects.filter(user=user).delete()
+    authors = (
+        user.follower.exclude(author__in=popular_authors())
+        .values_list('author', flat=True)
+    )
+    for author_id in authors:
+        _fill(user.id, author_id)
+    trim([user.id])
+
+
+def rebuild_many(user_ids):
+    """Пересобирает ленты многих пользователей за несколько запросов.
+
+    Посты каждого автора читаются один раз и сливаются в ленты в памяти,
+    вместо пары запросов на каждую подписку, как в ``rebuild``.
+    """
+    size = settings.TIMELINE_SIZE
+    follows = (
+        Follow.objects.filter(user__in=user_ids)
+        .exclude(author__in=popular_authors())
+        .values_list('user', 'author')
+    )
+    authors_of = {}
+    for user_id, author_id in follows:
+        authors_of.setdefault(user_id, []).append(author_id)
+    posts_of = {}
+    posts = (
+        Post.objects.filter(author__in={
+            author_id for authors in authors_of.values()
+            for author_id in authors
+        })
+        .order_by('-pub_date')
+        .values_list('author', 'pub_date', 'id')
+    )
+    for author_id, pub_date, post_id in posts.iterator():
+        author_posts = posts_of.setdefault(author_id, [])
+        if len(author_posts) < size:
+            author_posts.append((pub_date, post_id))
+    TimelineEntry.objects.filter(user__in=user_ids).delete()
+    for user_id, authors in authors_of.items():
+        latest = heapq.merge(
+            *(posts_of.get(author_id, []) for author_id in authors),
+            reverse=True,
+        )
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post_id,
+                           pub_date=pub_date)
+             for pub_date, post_id in islice(latest, size)],
+            ignore_conflicts=True,
+        )
+
+
+def _fill(user_id, author_id):
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .values_list('id', 'pub_date')[:settings.TIMELINE_SIZE]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts],
+        ignore_conflicts=True,
+    )
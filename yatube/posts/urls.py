@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 
@@ -8,7 +8,20 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('feed/', feeds.latest_feed, name='feed'),
+    path('group/<slug:slug>/feed/', feeds.group_feed, name='group_feed'),
+    path(
+        'profile/<str:username>/feed/',
+        feeds.author_feed,
+        name='profile_feed'
+    ),
+    path('search/', views.post_search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -16,6 +29,16 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('export/', views.export_posts, name='export'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path(
+        'api/profile/<str:username>/',
+        api.profile,
+        name='api_profile'
+    ),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,67 +1,218 @@
 
+import hashlib
+from functools import wraps
+
 from django.shortcuts import redirect, render, get_object_or_404
 from django.core.paginator import Paginator
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from .models import Post, Group, Follow, User
 from .forms import PostForm, CommentForm
+from .paginator import CursorPaginator
+from .search import search_posts
+from . import export, follow_graph, generations, thumbnails, timeline
 from django.contrib.auth.decorators import login_required
 
+POSTS_PER_PAGE = 10
+# Комментарии подгружаются страницами, даже если их тысячи
+COMMENTS_PER_PAGE = 20
+
 
 def get_page_context_paginator(queryset, request):
-    paginator = Paginator(queryset, 10)
+    if settings.POSTS_CURSOR_PAGINATION:
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = Paginator(queryset, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+def make_etag(request, *versions):
+    """ETag страницы: поколения её кеша, зритель и параметры запроса.
+
+    Считается до рендера и пагинации, так что на совпавший
+    If-None-Match ответ 304 обходится без работы с шаблоном.
+    """
+    parts = [*versions, request.user.pk, request.GET.urlencode()]
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def conditional(etag_func):
+    """Условный GET по ``etag_func``; ответ кешируется только браузером."""
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def get_group(request, slug):
+    # группа нужна и для ETag, и самой странице: читаем её один раз
+    if not hasattr(request, 'posts_group'):
+        request.posts_group = get_object_or_404(Group, slug=slug)
+    return request.posts_group
+
+
+def get_author(request, username):
+    if not hasattr(request, 'posts_author'):
+        request.posts_author = get_object_or_404(
+            User.objects.select_related('profile'),
+            username=username
+        )
+    return request.posts_author
+
+
+def get_post(request, post_id):
+    if not hasattr(request, 'posts_post'):
+        related = Post.objects.select_related('author__profile', 'group')
+        request.posts_post = get_object_or_404(related, pk=post_id)
+    return request.posts_post
+
+
+def index_etag(request):
+    return make_etag(request, generations.get_version(generations.GLOBAL))
+
+
+def group_etag(request, slug):
+    group = get_group(request, slug)
+    return make_etag(
+        request, generations.get_version(generations.GROUP, group.id)
+    )
+
+
+def profile_etag(request, username):
+    author = get_author(request, username)
+    return make_etag(
+        request,
+        generations.get_version(generations.AUTHOR, author.id),
+        generations.get_version(generations.PROFILE, author.id),
+    )
+
+
+def post_etag(request, post_id):
+    post = get_post(request, post_id)
+    return make_etag(
+        request,
+        generations.get_version(generations.POST, post.id),
+        generations.get_version(generations.AUTHOR, post.author_id),
+        generations.get_version(generations.GROUP, post.group_id),
+    )
+
+
+@conditional(index_etag)
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_listing()
     page_obj = get_page_context_paginator(posts, request)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'thumbnails': thumbnails.PageThumbnails(page_obj),
+        'cache_version': generations.get_version(generations.GLOBAL),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional(group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts_group.all()
+    group = get_group(request, slug)
+    posts = group.posts_group.for_listing()
     page_obj = get_page_context_paginator(posts, request)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'thumbnails': thumbnails.PageThumbnails(page_obj),
+        'cache_version': generations.get_version(
+            generations.GROUP, group.id
+        ),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(request, username)
     page_obj = get_page_context_paginator(
-        Post.objects.filter(author=author),
+        Post.objects.for_listing().filter(author=author),
         request
     )
     current_user = request.user
-    following = current_user.is_authenticated and author.following.exists()
+    following = (
+        current_user.is_authenticated
+        and follow_graph.is_following(current_user.id, author.id)
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
+        'thumbnails': thumbnails.PageThumbnails(page_obj),
         'following': following,
+        'cache_version': generations.get_version(
+            generations.AUTHOR, author.id
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(Post.objects.for_listing(), query)
+    page_obj = Paginator(posts, POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'thumbnails': thumbnails.PageThumbnails(page_obj),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional(post_etag)
 def post_detail(request, post_id):
-    related = Post.objects.select_related('author', 'group')
-    post = get_object_or_404(related, pk=post_id)
+    post = get_post(request, post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    cursor = request.GET.get('comments')
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': get_comments_page(post, cursor),
+        'comments_cursor': cursor,
+        'cache_version': generations.get_version(generations.POST, post.id),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def get_comments_page(post, cursor=None):
+    """Страница комментариев по курсору, от старых к новым.
+
+    Ключ (created, id) обслуживает индекс (post, created), так что
+    любая страница — один короткий запрос.
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=('created', 'id'),
+    )
+    return paginator.get_page(cursor)
+
+
+@conditional(post_etag)
+def post_comments(request, post_id):
+    """Следующая страница комментариев HTML-фрагментом для подгрузки."""
+    post = get_post(request, post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -72,6 +223,7 @@ def post_create(request):
         post_create = form.save(commit=False)
         post_create.author = request.user
         post_create.save()
+        thumbnails.schedule(post_create.image, normalize=True)
         return redirect('posts:profile', post_create.author)
     context = {'form': form}
     return render(request, 'posts/create_post.html', context)
@@ -80,7 +232,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if request.user != post.author:
+    if post.author_id != request.user.id:
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
@@ -88,7 +240,16 @@ def post_edit(request, post_id):
         instance=post or None
     )
     if form.is_valid():
-        form.save()
+        if 'image' in form.changed_data:
+            form.save()
+            thumbnails.schedule(post.image, normalize=True)
+        else:
+            # картинку мог перекодировать фон, пока форма была открыта:
+            # не возвращаем посту прежнее имя файла
+            post = form.save(commit=False)
+            post.save(update_fields=[
+                name for name in form.fields if name != 'image'
+            ])
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -115,12 +276,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    current_user = request.user
-    authors = current_user.follower.values_list('author', flat=True)
-    posts_list = Post.objects.filter(author__id__in=authors)
+    posts_list = timeline.get_feed(request.user).for_listing()
     page_obj = get_page_context_paginator(posts_list, request)
     context = {
         'page_obj': page_obj,
+        'thumbnails': thumbnails.PageThumbnails(page_obj),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -130,7 +290,12 @@ def profile_follow(request, username):
     author = User.objects.get(username=username)
     current_user = request.user
     if author != current_user:
-        Follow.objects.get_or_create(user=current_user, author=author)
+        _, created = Follow.objects.get_or_create(
+            user=current_user,
+            author=author
+        )
+        if created:
+            timeline.backfill(current_user, author)
         return redirect(
             'posts:profile',
             username
@@ -141,8 +306,28 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     current_user = request.user
-    Follow.objects.get(user=current_user, author__username=username).delete()
+    follow = Follow.objects.select_related('author').get(
+        user=current_user,
+        author__username=username
+    )
+    follow.delete()
+    timeline.prune(current_user, follow.author)
     return redirect(
         'posts:profile',
         username
     )
+
+
+@login_required
+def export_posts(request):
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in export.FORMATS:
+        raise Http404
+    generate, content_type, extension = export.FORMATS[fmt]
+    response = StreamingHttpResponse(
+        generate(request.user), content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{request.user.username}-posts.{extension}"'
+    )
+    return response
@@ -0,0 +1,27 @@
+// Подгружает следующую страницу комментариев вместо перехода по ссылке
+document.addEventListener('click', function (event) {
+  var button = event.target.closest('.js-more-comments');
+  if (!button) {
+    return;
+  }
+  event.preventDefault();
+  if (button.dataset.loading) {
+    return;
+  }
+  button.dataset.loading = '1';
+  fetch(button.dataset.fragment, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      button.insertAdjacentHTML('beforebegin', html);
+      button.remove();
+    })
+    .catch(function () {
+      // без подгрузки остаётся обычный переход по ссылке
+      window.location = button.href;
+    });
+});
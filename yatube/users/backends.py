@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+USER_TIMEOUT = 60 * 60
+
+
+def user_key(user_id):
+    return f'users:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя запроса из кеша.
+
+    Кеш сбрасывается при любом сохранении пользователя (смена пароля,
+    last_login при входе) и при выходе, так что проверка хеша сессии
+    в django.contrib.auth видит актуальный пароль. Поэтому и заполняется
+    он из основной базы: отстающая реплика вернула бы в кеш старый хеш
+    пароля на USER_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.db_manager(
+                    DEFAULT_DB_ALIAS
+                ).get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, USER_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    cache.delete(user_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_key(user.pk))
@@ -0,0 +1,84 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore
+)
+from django.core.exceptions import SuspiciousOperation
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+KEY_PREFIX = 'users:session:'
+
+
+class SessionStore(CachedDBStore):
+    """Сессии из кеша с отложенной записью в базу.
+
+    Чтение — как у cached_db: база нужна, только если сессии нет в кеше.
+    Изменённая сессия сразу пишется в кеш, а в django_session — не чаще
+    раза в SESSION_WRITE_BEHIND секунд. Создание и удаление сессии,
+    а также вход и смена пароля (ключи авторизации в сессии) идут в базу
+    сразу. Если кеш вытеснит сессию раньше, пропадут только прочие
+    изменения за последнее окно.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    @property
+    def synced_key(self):
+        return f'{self.cache_key}:synced'
+
+    def auth_state(self):
+        data = self._get_session()
+        return data.get(SESSION_KEY), data.get(HASH_SESSION_KEY)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        synced = self._cache.get(self.synced_key)
+        if (
+            must_create
+            or synced is None
+            or synced[1] != self.auth_state()
+            or time.time() - synced[0] >= settings.SESSION_WRITE_BEHIND
+        ):
+            super().save(must_create)
+            self._cache.set(
+                self.synced_key, (time.time(), self.auth_state()),
+                self.get_expiry_age()
+            )
+            return
+        self._cache.set(
+            self.cache_key, self._get_session(), self.get_expiry_age()
+        )
+
+    def primary(self):
+        # удалённая при выходе сессия ещё есть на отстающей реплике
+        return self.model._default_manager.db_manager(DEFAULT_DB_ALIAS)
+
+    def _get_session_from_db(self):
+        try:
+            return self.primary().get(
+                session_key=self.session_key,
+                expire_date__gt=timezone.now(),
+            )
+        except (self.model.DoesNotExist, SuspiciousOperation) as error:
+            if isinstance(error, SuspiciousOperation):
+                logging.getLogger(
+                    f'django.security.{type(error).__name__}'
+                ).warning(str(error))
+            self._session_key = None
+
+    def exists(self, session_key):
+        return bool(session_key) and (
+            f'{self.cache_key_prefix}{session_key}' in self._cache
+            or self.primary().filter(session_key=session_key).exists()
+        )
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        if session_key is not None:
+            self._cache.delete(f'{self.cache_key_prefix}{session_key}:synced')
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import time
+from http.cookies import SimpleCookie
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+
+from .backends import user_key
+
+User = get_user_model()
+
+
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='reader', password='old-password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='reader', password='old-password')
+
+    def page_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_logged_in_page_skips_session_and_user(self):
+        """С тёплым кешем сессия и пользователь не читаются из базы."""
+        url = reverse('about:author')
+        self.client.get(url)
+        response, queries = self.page_queries(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(queries, [])
+
+    def test_session_survives_cache_loss(self):
+        """Вход записан в базу сразу: без кеша сессия не теряется."""
+        cache.clear()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SESSION_WRITE_BEHIND=3600)
+    def test_write_behind(self):
+        """Изменения сессии в пределах окна пишутся только в кеш."""
+        session = self.client.session
+        key = session.session_key
+        session['theme'] = 'dark'
+        with CaptureQueriesContext(connection) as context:
+            session.save()
+        self.assertEqual(len(context), 0)
+        self.assertEqual(self.client.session['theme'], 'dark')
+        stored = Session.objects.get(session_key=key).get_decoded()
+        self.assertNotIn('theme', stored)
+
+    def test_logout_invalidates(self):
+        """После выхода сессии нет ни в кеше, ни в базе."""
+        key = self.client.session.session_key
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('users:logout'))
+        self.assertFalse(Session.objects.filter(session_key=key).exists())
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_invalidates_other_sessions(self):
+        """Смена пароля разлогинивает другие сессии сразу."""
+        other = Client()
+        other.login(username='reader', password='old-password')
+        other.get(reverse('posts:index'))
+        response = self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-password',
+            'new_password1': 'Nov-parol-123',
+            'new_password2': 'Nov-parol-123',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            self.client.get(reverse('posts:post_create')).status_code, 200
+        )
+        self.assertEqual(
+            other.get(reverse('posts:post_create')).status_code, 302
+        )
+
+
+@override_settings(REPLICAS=['replica1'])
+class LaggingReplicaTests(TransactionTestCase):
+    """Сессия и пользователь запроса не читаются с отстающей реплики."""
+
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.path,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica1'].close()
+        # иначе следующий тест получит соединение со старым файлом
+        del connections['replica1']
+        del connections.databases['replica1']
+        os.remove(cls.path)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-password'
+        )
+        self.client.login(username='reader', password='old-password')
+        # реплика знает пользователя и сессию, но дальше отстаёт
+        call_command('sync_replicas', stdout=StringIO())
+
+    def trust_replica(self):
+        # запись, попавшая в SYNC_MARGIN, оставляет реплику «свежей»:
+        # кеши пользователей должны обходиться без отметок синхронизации
+        routers.mark_synced('replica1', time.time() + routers.SYNC_MARGIN)
+
+    def test_password_change(self):
+        """Смена пароля разлогинивает, хоть реплика и помнит старый хеш."""
+        self.user.set_password('Nov-parol-123')
+        self.user.save()
+        self.trust_replica()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout(self):
+        """Сессия после выхода не оживает из копии на реплике."""
+        stale = Client()
+        stale.cookies = SimpleCookie(self.client.cookies)
+        self.client.get(reverse('users:logout'))
+        self.trust_replica()
+        response = stale.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
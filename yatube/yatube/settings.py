@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,7 +69,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,6 +97,40 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения. Локально это копии db.sqlite3, которые
+# обновляет команда sync_replicas, например:
+# REPLICA_FILES = [os.path.join(BASE_DIR, 'db.replica1.sqlite3')]
+REPLICA_FILES = []
+REPLICAS = []
+for number, path in enumerate(REPLICA_FILES, 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        # в тестах реплика — та же база, что и основная
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает из основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+# Производственный режим SQLite: WAL, прагмы и повторы при блокировках
+# (core.db) и постоянное соединение с основной базой. Реплики остаются
+# без CONN_MAX_AGE: sync_replicas подменяет их файлы, и долгое
+# соединение читало бы старую копию.
+SQLITE_PRODUCTION = False
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+if SQLITE_PRODUCTION:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,6 +169,13 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# collectstatic добавляет хеш к именам и пишет рядом .gz (и .br, если
+# установлен пакет brotli); до первого collectstatic ссылки без хеша
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Отдавать STATIC_ROOT самим Django (core.serve), когда перед ним нет
+# прокси, который раздаёт статику
+SERVE_STATIC = True
 
 # redirect
 
@@ -140,6 +183,13 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
+# Сессия и пользователь запроса читаются из кеша (users.sessions,
+# users.backends), а не из django_session и auth_user
+SESSION_ENGINE = 'users.sessions'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+# Изменённая сессия пишется в базу не чаще раза в столько секунд
+SESSION_WRITE_BEHIND = 60
+
 # filebased.EmailBackend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -148,11 +198,74 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
+# Отдавать MEDIA_ROOT самим Django (core.serve); если файлы может
+# отдать прокси, достаточно указать один из заголовков ниже
+SERVE_MEDIA = True
+# Префикс internal-локации nginx для X-Accel-Redirect, например
+# '/protected-media/'
+MEDIA_ACCEL_REDIRECT = None
+# Отдавать файлы заголовком X-Sendfile (Apache mod_xsendfile, lighttpd)
+MEDIA_X_SENDFILE = False
+
+# Общий для всех воркеров кеш в SQLite с небольшим LRU в памяти процесса.
+# Номера поколений (posts.generations), сессии и пользователи запросов
+# читаются только из общего уровня, чтобы после записи, выхода или смены
+# пароля все воркеры сразу видели изменения.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'L1_MAX_ENTRIES': 500,
+            'L1_TIMEOUT': 5,
+            'L1_BYPASS_PREFIXES': [
+                'posts:generation:', 'users:session:', 'users:user:',
+                'core:replicas:',
+            ],
+        },
     }
 }
 
+# Потоки, которые создают миниатюры картинок постов вне запроса;
+# 0 — создавать сразу, в том же потоке
+THUMBNAIL_WORKERS = 2
+
+# Ограничения на загружаемые картинки постов: размер файла в байтах
+# и число пикселей (защита от «бомб» с огромным разрешением)
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+# После загрузки картинка уменьшается до этой стороны, теряет EXIF
+# и перекодируется в POST_IMAGE_FORMAT (JPEG, если WEBP недоступен)
+POST_IMAGE_MAX_DIMENSION = 1920
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 82
+
+# Тесты держат кеш в памяти своего процесса: файл пережил бы прогон
+# и отдал бы фрагменты, собранные по чужой базе
+# manage.py test подменяет кеш на такой же в памяти (core.runner)
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# Курсорная пагинация лент (?cursor=...) вместо номеров страниц:
+# без COUNT(*) и OFFSET, любая страница стоит как первая
+POSTS_CURSOR_PAGINATION = False
+
+# Лента подписок: сколько последних постов хранится для каждого
+# подписчика и у скольких подписчиков автор считается популярным —
+# посты таких авторов не раскладываются по лентам, а читаются запросом
+TIMELINE_SIZE = 500
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Заголовок Server-Timing с разбивкой времени ответа (SQL, шаблоны,
+# кеш)
+SERVER_TIMING = True
+# Доступ к /metrics: Prometheus присылает «Authorization: Bearer
+# <METRICS_TOKEN>» и/или ходит с адресов METRICS_ALLOWED_IPS. Пока не
+# задано ни то ни другое, /metrics отвечает 404. За обратным прокси на
+# той же машине (nginx с X-Accel-Redirect и т. п.) REMOTE_ADDR у всех
+# клиентов — 127.0.0.1, так что список с локальным адресом открывает
+# /metrics всем; там нужен токен.
+METRICS_TOKEN = ''
+METRICS_ALLOWED_IPS = []
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure',
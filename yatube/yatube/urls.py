@@ -13,10 +13,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.serve import serve_media, serve_static
+from core.views import metrics_view
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
@@ -24,11 +28,21 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 handler404 = 'core.views.page_not_found'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.SERVE_MEDIA:
+    media_prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    urlpatterns += [
+        re_path(rf'^{media_prefix}(?P<path>.+)$', serve_media,
+                name='media'),
+    ]
+
+if settings.SERVE_STATIC:
+    static_prefix = re.escape(settings.STATIC_URL.lstrip('/'))
+    urlpatterns += [
+        re_path(rf'^{static_prefix}(?P<path>.+)$', serve_static,
+                name='static'),
+    ]